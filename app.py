@@ -1,11 +1,74 @@
+import logging
 import streamlit as st
-from display_utils import add_custom_css, display_header, display_executive_modal, display_exec_toggle_button, display_team_guidelines, display_circle_info
+from display_utils import add_custom_css, display_header, display_executive_modal, display_exec_toggle_button, display_team_guidelines, display_circle_info, display_email_delivery_status, display_profiler_panel
 from individual_form import individual_form
 from team_form import team_form
 from auth_service import initialize_auth, get_user_info
-from utils import initialize_session_state
-from sheets_service import check_existing_registrations
+from utils import initialize_session_state, get_existing_registrations, invalidate_registrations
+from submission_journal import start_submission_flusher
+from email_dispatcher import start_email_dispatcher
+from email_service import validate_smtp_config
+from profiler import start_profiler, timed, is_admin
+
+logger = logging.getLogger(__name__)
+
+@st.fragment
+def team_selection(user_email):
+    """Team picker, guidelines and registration forms; reruns on its own when they change"""
+    # Team selection (now multiple)
+    st.markdown("### 🎯 Select Your Teams")
+    
+    # Get available teams (exclude already registered teams if applicable)
+    available_teams = list(st.session_state.data.keys())
+    if st.session_state.get("existing_teams"):
+        available_teams = [team for team in available_teams if team not in st.session_state.existing_teams]
+    
+    max_selections = 3
+    if st.session_state.get("existing_teams"):
+        max_selections = 3 - len(st.session_state.existing_teams)
+    
+    selected_teams = st.multiselect(
+        f"Choose your preferred teams (Select up to {max_selections})*", 
+        available_teams,
+        max_selections=max_selections,
+        key="team_multiselect",
+        help=f"Select up to {max_selections} teams you want to join. Guidelines will appear below."
+    )
+
+    if selected_teams != st.session_state.get("selectedTeams", []):
+        st.session_state.selectedTeams = selected_teams
+
+    if st.session_state.selectedTeams:
+        st.success(f"Please review the guidelines for: **{', '.join(st.session_state.selectedTeams)}**")
+    else:
+        st.warning(f"⚠️ Please select at least 1 team (up to {max_selections}) to continue")
+
+    st.markdown("---")
+
+    # Create responsive columns - Guidelines LEFT, Forms RIGHT
+    if st.session_state.selectedTeams:  # Only show forms if teams are selected
+        col1, col2 = st.columns([1, 2])
+
+        with col1:
+            display_team_guidelines()
 
+        with col2:
+            selected = st.radio(
+                '📝 Registration Type:', 
+                options=['Individual', 'Team'], 
+                horizontal=True,
+                help="Individual: Solo application | Team: Group application (max 5 members)"
+            )
+
+            if selected == 'Individual':
+                individual_form(user_email)
+            else:
+                team_form(user_email)
+
+    else:
+        display_team_guidelines()
+
+@timed("rerun")
 def main():
     # Initialize session state
     initialize_session_state()
@@ -23,6 +86,11 @@ def main():
         }
     )
 
+    # Resume draining journaled submissions to Google Sheets (no-op once running)
+    start_submission_flusher()
+    start_email_dispatcher()
+    start_profiler()
+
     # Initialize authentication
     initialize_auth()
 
@@ -32,16 +100,16 @@ def main():
     # Get user info
     user_info = get_user_info()
 
+    # Timing panel for admins listed in the [profiling] secrets
+    if user_info and is_admin(user_info["email"]):
+        display_profiler_panel()
+
     # Check if form is submitted
     if st.session_state.get("form_submitted", False):
         if st.session_state.get("submission_type") == "individual":
             st.success("🎉 Individual application submitted successfully!")
             selected_teams = st.session_state.get("selected_teams", [])
             st.success(f"Selected Teams: **{', '.join(selected_teams)}**")
-            if st.session_state.get("email_sent", False):
-                st.success("📧 Confirmation email sent to your registered email address!")
-            else:
-                st.warning("⚠️ Application saved but confirmation email could not be sent.")
         else:
             team_name = st.session_state.get("team_name", "Your Team")
             member_count = st.session_state.get("member_count", 1)
@@ -49,16 +117,11 @@ def main():
             st.success(f"🎉 Team application submitted successfully!")
             st.success(f"Team: **{team_name}** with **{member_count} members**")
             st.success(f"Selected Teams: **{', '.join(selected_teams)}**")
-            successful_emails = st.session_state.get("successful_emails", 0)
-            total_members = st.session_state.get("member_count", 1)
-            if successful_emails == total_members:
-                st.success("📧 Confirmation emails sent to all team members!")
-            elif successful_emails > 0:
-                st.success(f"📧 Confirmation emails sent to {successful_emails} out of {total_members} team members!")
-                st.warning("⚠️ Some confirmation emails could not be sent.")
-            else:
-                st.warning("⚠️ Team application saved but confirmation emails could not be sent.")
-        st.balloons()
+        display_email_delivery_status(st.session_state.get("email_jobs", []))
+        # Only celebrate once; later reruns just refresh the delivery status
+        if not st.session_state.get("celebrated", False):
+            st.session_state.celebrated = True
+            st.balloons()
         return
 
     # Display header
@@ -80,7 +143,10 @@ def main():
         return
 
     # User is logged in - check existing registrations
-    existing_registrations = check_existing_registrations(user_info["email"])
+    existing_registrations = get_existing_registrations(user_info["email"])
+    
+    if existing_registrations.get("partial"):
+        st.warning("⚠️ Some of your existing registrations could not be loaded right now. The list below may be incomplete.")
     
     if existing_registrations["found"]:
         st.success(f"Welcome back! You are already registered for {len(existing_registrations['teams'])} team(s).")
@@ -106,6 +172,7 @@ def main():
             if st.button("➕ Register for Additional Teams"):
                 st.session_state.allow_additional_registration = True
                 st.session_state.existing_teams = existing_registrations['teams']
+                invalidate_registrations()
                 st.rerun()
         else:
             st.success("🎉 You have registered for the maximum number of teams (3). Thank you!")
@@ -114,6 +181,13 @@ def main():
     # Show registration form if user hasn't registered or wants to add more teams
     if not existing_registrations["found"] or st.session_state.get("allow_additional_registration", False):
         
+        # Fail fast on email misconfiguration instead of after a submission is saved
+        email_ready, email_error = validate_smtp_config()
+        if not email_ready:
+            logger.error(email_error)
+            st.error("⚠️ Registration is temporarily unavailable. Please try again later or contact us at knowledgesharingcirclekhec@gmail.com.")
+            return
+        
         # Executive toggle button (collapsed after login)
         display_exec_toggle_button()
 
@@ -127,58 +201,7 @@ def main():
             We can schedule meetings later as per your convenience and availability.
             """)
 
-            # Team selection (now multiple)
-            st.markdown("### 🎯 Select Your Teams")
-            
-            # Get available teams (exclude already registered teams if applicable)
-            available_teams = list(st.session_state.data.keys())
-            if st.session_state.get("existing_teams"):
-                available_teams = [team for team in available_teams if team not in st.session_state.existing_teams]
-            
-            max_selections = 3
-            if st.session_state.get("existing_teams"):
-                max_selections = 3 - len(st.session_state.existing_teams)
-            
-            selected_teams = st.multiselect(
-                f"Choose your preferred teams (Select up to {max_selections})*", 
-                available_teams,
-                max_selections=max_selections,
-                key="team_multiselect",
-                help=f"Select up to {max_selections} teams you want to join. Guidelines will appear below."
-            )
-
-            if selected_teams != st.session_state.get("selectedTeams", []):
-                st.session_state.selectedTeams = selected_teams
-
-            if st.session_state.selectedTeams:
-                st.success(f"Please review the guidelines for: **{', '.join(st.session_state.selectedTeams)}**")
-            else:
-                st.warning(f"⚠️ Please select at least 1 team (up to {max_selections}) to continue")
-
-            st.markdown("---")
-
-            # Create responsive columns - Guidelines LEFT, Forms RIGHT
-            if st.session_state.selectedTeams:  # Only show forms if teams are selected
-                col1, col2 = st.columns([1, 2])
-
-                with col1:
-                    display_team_guidelines()
-
-                with col2:
-                    selected = st.radio(
-                        '📝 Registration Type:', 
-                        options=['Individual', 'Team'], 
-                        horizontal=True,
-                        help="Individual: Solo application | Team: Group application (max 5 members)"
-                    )
-
-                    if selected == 'Individual':
-                        individual_form(user_info["email"])
-                    else:
-                        team_form(user_info["email"])
-
-            else:
-                display_team_guidelines()
+            team_selection(user_info["email"])
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -1,8 +1,19 @@
 import streamlit as st
 from google_auth_oauthlib.flow import Flow
-import google.auth.transport.requests
+import logging
 import requests
 
+from id_token_verifier import verify_google_id_token
+from token_refresh import ensure_fresh_credentials
+from profiler import timed
+
+logger = logging.getLogger(__name__)
+
+USERINFO_URL = "https://www.googleapis.com/oauth2/v1/userinfo"
+
+# Pooled HTTP session shared by all reruns for userinfo calls
+_http_session = requests.Session()
+
 def display_login_button(auth_url):
     """Display a styled Google login button"""
     st.markdown("""
@@ -80,6 +91,7 @@ def display_login_button(auth_url):
     </div>
     """.format(auth_url), unsafe_allow_html=True)
 
+@timed("initialize_auth")
 def initialize_auth():
     # Initialize session state for credentials
     if "credentials" not in st.session_state:
@@ -130,24 +142,79 @@ def initialize_auth():
                 st.query_params.clear()
                 st.rerun()
 
+def _fetch_user_info(token):
+    """Fetch the signed-in user's profile from Google"""
+    response = _http_session.get(
+        USERINFO_URL,
+        params={"alt": "json"},
+        headers={"Authorization": f"Bearer {token}"},
+        timeout=10
+    )
+    response.raise_for_status()
+    user_info = response.json()
+
+    return {
+        "name": user_info.get("name", ""),
+        "email": user_info.get("email", ""),
+        "picture": user_info.get("picture", "")
+    }
+
+def _user_info_from_id_token(creds):
+    """Derive the profile from the OAuth ID token, verified locally; None if unavailable"""
+    if not creds.id_token:
+        return None
+    try:
+        claims = verify_google_id_token(creds.id_token, st.secrets["gcp_oauth"]["client_id"])
+    except Exception as e:
+        logger.warning(f"ID token verification failed, falling back to userinfo: {str(e)}")
+        return None
+
+    return {
+        "name": claims.get("name", ""),
+        "email": claims.get("email", ""),
+        "picture": claims.get("picture", "")
+    }
+
+def _sign_out():
+    """Drop the session's credentials so the next rerun shows the login button"""
+    st.session_state.credentials = None
+    st.session_state.pop("user_info_cache", None)
+
+@timed("get_user_info")
 def get_user_info():
     if st.session_state.credentials:
         creds = st.session_state.credentials
-        request_session = requests.Session()
-        token_request = google.auth.transport.requests.Request(session=request_session)
-
-        if creds.expired and creds.refresh_token:
-            creds.refresh(token_request)
-
-        user_info = requests.get(
-            "https://www.googleapis.com/oauth2/v1/userinfo",
-            params={"alt": "json"},
-            headers={"Authorization": f"Bearer {creds.token}"}
-        ).json()
-
-        return {
-            "name": user_info.get("name", ""),
-            "email": user_info.get("email", ""),
-            "picture": user_info.get("picture", "")
-        }
-    return None
\ No newline at end of file
+
+        try:
+            ensure_fresh_credentials(creds)
+        except Exception as e:
+            logger.error(f"Error refreshing OAuth credentials: {str(e)}")
+            if creds.expired:
+                # The session cannot be renewed, so ask the user to sign in again
+                _sign_out()
+                st.rerun()
+
+        # Userinfo only changes with the access token, so reruns reuse it until login or refresh
+        cached = st.session_state.get("user_info_cache")
+        if cached and cached["token"] == creds.token and not creds.expired:
+            return cached["user_info"]
+
+        user_info = _user_info_from_id_token(creds)
+        if not user_info:
+            try:
+                user_info = _fetch_user_info(creds.token)
+            except requests.exceptions.HTTPError as e:
+                if e.response is not None and e.response.status_code == 401:
+                    # The access token was revoked or rejected
+                    logger.warning("Userinfo rejected the access token; asking the user to sign in again")
+                    _sign_out()
+                    st.rerun()
+                logger.error(f"Error fetching user info: {str(e)}")
+                return None
+            except Exception as e:
+                logger.error(f"Error fetching user info: {str(e)}")
+                return None
+
+        st.session_state.user_info_cache = {"token": creds.token, "user_info": user_info}
+        return user_info
+    return None
@@ -1,5 +1,71 @@
 import streamlit as st
+import hashlib
+import html
+import json
+import threading
+from types import MappingProxyType
+from email_dispatcher import get_email_statuses, STATUS_QUEUED, STATUS_SENT
+import metrics
+from profiler import timed, is_enabled, set_enabled, PHASE_METRIC
 
+# Rendered HTML fragments keyed by (kind, content hash, variant); content only
+# changes when the JSON files do
+_html_cache = {}
+_content_hashes = {}
+_html_lock = threading.Lock()
+
+def _content_hash(content):
+    """Hash of a JSON content object, memoized for the shared read-only copies"""
+    shared = isinstance(content, MappingProxyType)
+    memo = _content_hashes.get(id(content)) if shared else None
+    # The memo keeps a reference to the content, so its id cannot be reused
+    if memo and memo[0] is content:
+        return memo[1]
+    digest = hashlib.sha256(json.dumps(content, sort_keys=True, default=dict).encode("utf-8")).hexdigest()
+    if shared:
+        with _html_lock:
+            _content_hashes[id(content)] = (content, digest)
+    return digest
+
+def _cached_html(key, render):
+    """Return the cached HTML for ``key``, rendering it on first use"""
+    with _html_lock:
+        fragment = _html_cache.get(key)
+    if fragment is None:
+        fragment = render()
+        with _html_lock:
+            _html_cache[key] = fragment
+    return fragment
+
+def _render_list(items):
+    return "<ul>" + "".join(f"<li>{html.escape(str(item))}</li>" for item in items) + "</ul>"
+
+def _render_block(title, body, expanded):
+    return (
+        f'<details class="content-block"{" open" if expanded else ""}>'
+        f"<summary>{html.escape(title)}</summary>{body}</details>"
+    )
+
+def _render_team_guideline(team, team_info, expanded):
+    """One team's guidelines as a collapsible three-column HTML block"""
+    columns = (
+        '<div class="guideline-columns">'
+        f"<div><strong>✨ Why Join?</strong><p>{html.escape(team_info.get('Why Join', ''))}</p></div>"
+        f"<div><strong>📝 Key Responsibilities</strong>{_render_list(team_info.get('Key Responsibilities', []))}</div>"
+        f"<div><strong>⚠️ Why Avoid?</strong><p>{html.escape(team_info.get('Why Avoid', ''))}</p></div>"
+        "</div>"
+    )
+    return _render_block(f"🎯 {team}", columns, expanded)
+
+def _render_circle_info(circle_info):
+    """About, mission and vision as HTML blocks"""
+    return (
+        _render_block("📖 About Us", f"<p>{html.escape(circle_info.get('about', ''))}</p>", True)
+        + _render_block("🎯 Our Mission", _render_list(circle_info.get("mission", [])), True)
+        + _render_block("🔮 Vision", f"<p>{html.escape(circle_info.get('vision', ''))}</p>", True)
+    )
+
+@timed("add_custom_css")
 def add_custom_css():
     """Add custom CSS for better mobile experience and clean styling"""
     st.markdown("""
@@ -141,8 +207,33 @@ def add_custom_css():
         margin-left: 0.5rem;
     }
     
+    /* Pre-rendered guideline and circle info blocks */
+    .content-block {
+        border: 1px solid rgba(250, 250, 250, 0.2);
+        border-radius: 8px;
+        margin-bottom: 0.75rem;
+        padding: 0.5rem 1rem;
+    }
+    
+    .content-block summary {
+        cursor: pointer;
+        font-weight: 600;
+        padding: 0.25rem 0;
+    }
+    
+    .guideline-columns {
+        display: grid;
+        grid-template-columns: repeat(3, 1fr);
+        gap: 1rem;
+        padding-top: 0.5rem;
+    }
+    
     /* Mobile responsive */
     @media (max-width: 768px) {
+        .guideline-columns {
+            grid-template-columns: 1fr;
+        }
+        
         .main-title {
             font-size: 1.5rem;
         }
@@ -209,45 +300,83 @@ def display_exec_toggle_button():
         st.markdown('</div>', unsafe_allow_html=True)
 
 def display_circle_info():
-    """Display circle information using Streamlit components"""
+    """Display circle information from its cached HTML"""
+    circle_info = st.session_state.circle_data.get("circle_info", {})
+    fragment = _cached_html(
+        ("circle_info", _content_hash(circle_info)), lambda: _render_circle_info(circle_info)
+    )
     with st.container():
         st.markdown("### 🌟 Knowledge Sharing Circle")
-        
-        with st.expander("📖 About Us", expanded=True):
-            st.write(st.session_state.circle_data.get("circle_info", {}).get("about", ""))
-        
-        with st.expander("🎯 Our Mission", expanded=True):
-            for mission_item in st.session_state.circle_data.get("circle_info", {}).get("mission", []):
-                st.write(f"• {mission_item}")
-        
-        with st.expander("🔮 Vision", expanded=True):
-            st.write(st.session_state.circle_data.get("circle_info", {}).get("vision", ""))
+        st.markdown(fragment, unsafe_allow_html=True)
 
+@timed("display_team_guidelines")
 def display_team_guidelines():
-    """Display team guidelines using Streamlit components"""
+    """Display guidelines for the selected teams by joining their cached HTML blocks"""
     selected_teams = st.session_state.get("selectedTeams", [])
     
     if selected_teams:
+        expanded = len(selected_teams) == 1
+        fragments = []
+        for team in selected_teams:
+            team_info = st.session_state.data.get(team, {})
+            fragments.append(_cached_html(
+                ("team", team, _content_hash(team_info), expanded),
+                lambda: _render_team_guideline(team, team_info, expanded)
+            ))
+
         with st.container():
             st.markdown(f"### 📋 Guidelines for Selected Teams")
-            
-            for team in selected_teams:
-                team_info = st.session_state.data.get(team, {})
-                
-                with st.expander(f"🎯 {team}", expanded=len(selected_teams) == 1):
-                    col1, col2, col3 = st.columns(3)
-                    
-                    with col1:
-                        st.markdown("**✨ Why Join?**")
-                        st.write(team_info.get("Why Join", ""))
-                    
-                    with col2:
-                        st.markdown("**📝 Key Responsibilities**")
-                        for responsibility in team_info.get("Key Responsibilities", []):
-                            st.write(f"• {responsibility}")
-                    
-                    with col3:
-                        st.markdown("**⚠️ Why Avoid?**")
-                        st.write(team_info.get("Why Avoid", ""))
+            st.markdown("".join(fragments), unsafe_allow_html=True)
     else:
-        display_circle_info()
\ No newline at end of file
+        display_circle_info()
+
+def display_email_delivery_status(email_jobs):
+    """Display per-recipient status of the queued confirmation emails"""
+    statuses = get_email_statuses(email_jobs)
+    if not statuses:
+        st.warning("⚠️ Application saved but confirmation emails could not be sent.")
+        return
+
+    for status in statuses:
+        recipient = status.get("recipient_name") or status.get("recipient_email", "recipient")
+        if status["status"] == STATUS_SENT:
+            st.success(f"📧 Confirmation email sent to **{recipient}**")
+        elif status["status"] == STATUS_QUEUED:
+            st.info(f"📨 Sending confirmation email to **{recipient}**...")
+        else:
+            st.warning(f"⚠️ Confirmation email to **{recipient}** could not be sent.")
+
+    if any(status["status"] == STATUS_QUEUED for status in statuses):
+        if st.button("🔄 Refresh email status", key="refresh_email_status"):
+            st.rerun()
+
+def display_profiler_panel():
+    """Admin-only sidebar panel with per-phase rerun timings across all sessions"""
+    with st.sidebar.expander("⏱️ Rerun timings", expanded=False):
+        # The flag is process-wide: show its current value and only write it when this
+        # admin actually flips the toggle, so another session's stale state can't undo it
+        st.session_state["profiler_enabled"] = is_enabled()
+        st.toggle(
+            "Record timings", key="profiler_enabled",
+            on_change=lambda: set_enabled(st.session_state["profiler_enabled"])
+        )
+
+        rows = [
+            {
+                "Phase": summary["labels"].get("phase", ""),
+                "Calls": summary["count"],
+                "p50 (ms)": round(summary["quantiles"][0.5] * 1000, 1),
+                "p95 (ms)": round(summary["quantiles"][0.95] * 1000, 1),
+                "p99 (ms)": round(summary["quantiles"][0.99] * 1000, 1)
+            }
+            for summary in metrics.summaries() if summary["name"] == PHASE_METRIC
+        ]
+        if rows:
+            st.dataframe(rows, hide_index=True, use_container_width=True)
+        else:
+            st.caption("No timings recorded yet.")
+
+        st.download_button(
+            "Download Prometheus metrics", metrics.prometheus_text(),
+            file_name="metrics.prom", mime="text/plain", key="profiler_export"
+        )
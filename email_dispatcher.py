@@ -0,0 +1,174 @@
+import logging
+import threading
+import time
+import uuid
+from typing import List, Dict, Any
+
+from profiler import timed
+from email_service import build_confirmation_message, deliver_messages
+from email_outbox import email_outbox, OUTBOX_SENT, OUTBOX_DEAD
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Number of background threads sending queued emails
+EMAIL_WORKERS = 2
+
+# Messages a worker claims and delivers together (concurrently in async mode)
+CLAIM_BATCH_SIZE = 10
+
+# How often idle workers look for retries that have become due (seconds)
+POLL_INTERVAL = 5
+
+# How often idle workers return messages with an expired sending lease to the queue (seconds)
+REQUEUE_INTERVAL = 60
+
+STATUS_QUEUED = "queued"
+STATUS_SENT = "sent"
+STATUS_FAILED = "failed"
+
+
+class EmailDispatcher:
+    """Sends confirmation emails from a background worker pool.
+
+    Form handlers render and record a message in the durable outbox and
+    return immediately; workers drain the outbox and the success screen reads
+    per-recipient delivery status by job ID.
+    """
+
+    def __init__(self, workers: int = EMAIL_WORKERS):
+        self.workers = workers
+        self._wakeup = threading.Condition()
+        self._lock = threading.Lock()
+        self._threads = []
+        self._last_requeue = 0.0
+
+    def start(self):
+        """Start the worker threads (idempotent); pending outbox messages resume"""
+        with self._lock:
+            if not self._threads:
+                # Messages left mid-send by a previous process are sent again
+                self._requeue_abandoned()
+            self._threads = [t for t in self._threads if t.is_alive()]
+            for i in range(len(self._threads), self.workers):
+                thread = threading.Thread(
+                    target=self._run_worker, name=f"email-dispatcher-{i}", daemon=True
+                )
+                thread.start()
+                self._threads.append(thread)
+
+    def enqueue(self, emails: List[Dict[str, Any]]) -> List[str]:
+        """Render confirmation emails, record them in the outbox and return their job IDs.
+
+        Emails enqueued together (e.g. a whole team) are claimed and sent as one
+        batch; an email that cannot be rendered gets None instead of a job ID.
+        """
+        job_ids = []
+        records = []
+        for email_kwargs in emails:
+            msg = build_confirmation_message(**email_kwargs)
+            if not msg:
+                logger.error(f"Failed to create confirmation email for {email_kwargs['recipient_email']}")
+                job_ids.append(None)
+                continue
+
+            job_id = uuid.uuid4().hex
+            job_ids.append(job_id)
+            records.append((job_id, email_kwargs["recipient_email"], email_kwargs["recipient_name"], msg.as_string()))
+
+        if records:
+            email_outbox.add(records)
+            self.start()
+            with self._wakeup:
+                self._wakeup.notify()
+        return job_ids
+
+    def get_statuses(self, job_ids: List[str]) -> List[Dict[str, Any]]:
+        """Delivery status for each job ID, in the given order"""
+        outbox_statuses = email_outbox.statuses(job_ids)
+        statuses = []
+        for job_id in job_ids:
+            status = dict(outbox_statuses.get(job_id, {"status": OUTBOX_DEAD}), job_id=job_id)
+            if status["status"] == OUTBOX_SENT:
+                status["status"] = STATUS_SENT
+            elif status["status"] == OUTBOX_DEAD:
+                status["status"] = STATUS_FAILED
+            else:
+                # Still waiting, being sent, or scheduled for a retry
+                status["status"] = STATUS_QUEUED
+            statuses.append(status)
+        return statuses
+
+    def _requeue_abandoned(self):
+        """Requeue messages whose sending lease expired (at most once per interval)"""
+        if self._last_requeue and time.monotonic() - self._last_requeue < REQUEUE_INTERVAL:
+            return
+        self._last_requeue = time.monotonic()
+        try:
+            email_outbox.requeue_abandoned()
+        except Exception as e:
+            logger.error(f"Error requeueing abandoned emails: {str(e)}")
+
+    def _run_worker(self):
+        while True:
+            try:
+                claimed = email_outbox.claim_due(CLAIM_BATCH_SIZE)
+            except Exception as e:
+                logger.error(f"Error reading email outbox: {str(e)}")
+                claimed = []
+
+            if not claimed:
+                self._requeue_abandoned()
+                with self._wakeup:
+                    self._wakeup.wait(POLL_INTERVAL)
+                continue
+
+            try:
+                errors = deliver_messages([(recipient_email, message) for _, recipient_email, message, _ in claimed])
+            except Exception as e:
+                errors = [e] * len(claimed)
+
+            for (job_id, recipient_email, _, attempts), error in zip(claimed, errors):
+                # A failed status update must not kill the worker; the message stays
+                # sending and is requeued once its lease expires
+                try:
+                    if error:
+                        email_outbox.mark_failed(job_id, attempts, error)
+                    else:
+                        email_outbox.mark_sent(job_id)
+                        logger.info(f"Confirmation email sent successfully to {recipient_email}")
+                except Exception as e:
+                    logger.error(f"Error recording delivery of email {job_id}: {str(e)}")
+
+
+# Global instance
+email_dispatcher = EmailDispatcher()
+
+def start_email_dispatcher():
+    """Convenience function to resume sending outbox messages (e.g. after a restart)"""
+    email_dispatcher.start()
+
+@timed("queue_confirmation_email")
+def queue_confirmation_email(recipient_email, recipient_name, team_name, submission_type, team_details=None, email_type="general") -> str:
+    """Convenience function to send a confirmation email in the background"""
+    job_id = email_dispatcher.enqueue([{
+        "recipient_email": recipient_email,
+        "recipient_name": recipient_name,
+        "team_name": team_name,
+        "submission_type": submission_type,
+        "team_details": team_details,
+        "email_type": email_type
+    }])[0]
+    if not job_id:
+        raise RuntimeError("Failed to create confirmation email")
+    return job_id
+
+@timed("queue_confirmation_emails")
+def queue_confirmation_emails(emails: List[Dict[str, Any]]) -> List[str]:
+    """Convenience function to send several confirmation emails as one batch"""
+    return email_dispatcher.enqueue(emails)
+
+def get_email_statuses(job_ids: List[str]) -> List[Dict[str, Any]]:
+    """Convenience function to read delivery status for queued emails"""
+    return email_dispatcher.get_statuses(job_ids)
@@ -0,0 +1,242 @@
+import argparse
+import logging
+import random
+import sqlite3
+import threading
+import time
+from typing import List, Dict, Any, Tuple
+
+from email_service import get_smtp_config, is_permanent_failure, send_batch
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Local outbox database (WAL mode) holding every rendered confirmation email
+OUTBOX_DB_PATH = "email_outbox.db"
+
+# Retry policy for transient delivery failures (seconds / attempts)
+RETRY_BASE_DELAY = 30
+RETRY_MAX_DELAY = 3600
+MAX_ATTEMPTS = 8
+
+# A message still marked sending after this long was abandoned by a stopped worker (seconds)
+SENDING_LEASE_TIMEOUT = 900
+
+# Outbox message states
+OUTBOX_QUEUED = "queued"
+OUTBOX_SENDING = "sending"
+OUTBOX_SENT = "sent"
+OUTBOX_DEAD = "dead"
+
+
+class EmailOutbox:
+    """Durable outbox of rendered confirmation emails.
+
+    Every message is recorded before it is sent. Transient failures are
+    retried with exponential backoff; permanent failures (and messages that
+    exhaust their attempts) move to the dead-letter table for replay.
+    """
+
+    def __init__(self, db_path: str = OUTBOX_DB_PATH):
+        self.db_path = db_path
+        self._conn = None
+        self._lock = threading.Lock()
+
+    def _connection(self) -> sqlite3.Connection:
+        """Open the outbox database on first use"""
+        if self._conn is None:
+            conn = sqlite3.connect(self.db_path, check_same_thread=False, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=FULL")
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS outbox (
+                    id TEXT PRIMARY KEY,
+                    recipient_email TEXT NOT NULL,
+                    recipient_name TEXT NOT NULL,
+                    message TEXT NOT NULL,
+                    status TEXT NOT NULL,
+                    attempts INTEGER NOT NULL DEFAULT 0,
+                    next_attempt_at REAL NOT NULL DEFAULT 0,
+                    last_error TEXT,
+                    created_at REAL NOT NULL,
+                    updated_at REAL NOT NULL
+                )
+            """)
+            conn.execute(
+                "CREATE INDEX IF NOT EXISTS idx_outbox_due ON outbox (status, next_attempt_at)"
+            )
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS dead_letters (
+                    id TEXT PRIMARY KEY,
+                    recipient_email TEXT NOT NULL,
+                    message TEXT NOT NULL,
+                    attempts INTEGER NOT NULL,
+                    last_error TEXT,
+                    failed_at REAL NOT NULL
+                )
+            """)
+            self._conn = conn
+        return self._conn
+
+    def add(self, messages: List[Tuple[str, str, str, str]]):
+        """Durably record rendered (id, recipient email, recipient name, message) tuples"""
+        now = time.time()
+        with self._lock:
+            conn = self._connection()
+            # One transaction so a team's messages become due together
+            conn.execute("BEGIN")
+            try:
+                conn.executemany(
+                    "INSERT INTO outbox (id, recipient_email, recipient_name, message, status, created_at, updated_at) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                    [(message_id, recipient_email, recipient_name, message, OUTBOX_QUEUED, now, now)
+                     for message_id, recipient_email, recipient_name, message in messages]
+                )
+            except Exception:
+                conn.execute("ROLLBACK")
+                raise
+            conn.execute("COMMIT")
+
+    def claim_due(self, limit: int) -> List[Tuple[str, str, str, int]]:
+        """Mark up to ``limit`` due messages as sending and return them"""
+        with self._lock:
+            conn = self._connection()
+            rows = conn.execute(
+                "SELECT id, recipient_email, message, attempts FROM outbox "
+                "WHERE status = ? AND next_attempt_at <= ? ORDER BY created_at LIMIT ?",
+                (OUTBOX_QUEUED, time.time(), limit)
+            ).fetchall()
+            conn.executemany(
+                "UPDATE outbox SET status = ?, updated_at = ? WHERE id = ?",
+                [(OUTBOX_SENDING, time.time(), row[0]) for row in rows]
+            )
+        return rows
+
+    def requeue_abandoned(self, lease_timeout: float = SENDING_LEASE_TIMEOUT) -> int:
+        """Return messages stuck in sending longer than ``lease_timeout`` to the queue"""
+        with self._lock:
+            cursor = self._connection().execute(
+                "UPDATE outbox SET status = ?, updated_at = ? WHERE status = ? AND updated_at < ?",
+                (OUTBOX_QUEUED, time.time(), OUTBOX_SENDING, time.time() - lease_timeout)
+            )
+        if cursor.rowcount:
+            logger.warning(f"Requeued {cursor.rowcount} email(s) abandoned mid-send")
+        return cursor.rowcount
+
+    def mark_sent(self, message_id: str):
+        with self._lock:
+            self._connection().execute(
+                "UPDATE outbox SET status = ?, last_error = NULL, updated_at = ? WHERE id = ?",
+                (OUTBOX_SENT, time.time(), message_id)
+            )
+
+    def mark_failed(self, message_id: str, attempts: int, error: Exception):
+        """Schedule a retry, or dead-letter the message when it cannot succeed"""
+        attempts += 1
+        now = time.time()
+        with self._lock:
+            conn = self._connection()
+            if is_permanent_failure(error) or attempts >= MAX_ATTEMPTS:
+                conn.execute(
+                    "INSERT OR REPLACE INTO dead_letters (id, recipient_email, message, attempts, last_error, failed_at) "
+                    "SELECT id, recipient_email, message, ?, ?, ? FROM outbox WHERE id = ?",
+                    (attempts, str(error), now, message_id)
+                )
+                conn.execute(
+                    "UPDATE outbox SET status = ?, attempts = ?, last_error = ?, updated_at = ? WHERE id = ?",
+                    (OUTBOX_DEAD, attempts, str(error), now, message_id)
+                )
+                logger.error(f"Email {message_id} moved to dead letters: {str(error)}")
+                return
+
+            # Exponential backoff with jitter, capped
+            delay = min(RETRY_MAX_DELAY, RETRY_BASE_DELAY * (2 ** (attempts - 1)))
+            delay = random.uniform(delay / 2, delay)
+            conn.execute(
+                "UPDATE outbox SET status = ?, attempts = ?, next_attempt_at = ?, last_error = ?, updated_at = ? "
+                "WHERE id = ?",
+                (OUTBOX_QUEUED, attempts, now + delay, str(error), now, message_id)
+            )
+        logger.warning(f"Email {message_id} failed ({str(error)}), retrying in {delay:.0f}s")
+
+    def statuses(self, message_ids: List[str]) -> Dict[str, Dict[str, Any]]:
+        """Current state of each known message ID"""
+        if not message_ids:
+            return {}
+        placeholders = ", ".join("?" for _ in message_ids)
+        with self._lock:
+            rows = self._connection().execute(
+                f"SELECT id, recipient_email, recipient_name, status, attempts, last_error "
+                f"FROM outbox WHERE id IN ({placeholders})",
+                list(message_ids)
+            ).fetchall()
+        return {
+            row[0]: {
+                "recipient_email": row[1],
+                "recipient_name": row[2],
+                "status": row[3],
+                "attempts": row[4],
+                "last_error": row[5]
+            }
+            for row in rows
+        }
+
+    def dead_letters(self) -> List[Tuple[str, str, str]]:
+        with self._lock:
+            return self._connection().execute(
+                "SELECT id, recipient_email, message FROM dead_letters ORDER BY failed_at"
+            ).fetchall()
+
+    def replay_dead_letters(self) -> Tuple[int, int]:
+        """Resend every dead letter through one pooled connection; returns (sent, failed)"""
+        letters = self.dead_letters()
+        if not letters:
+            return 0, 0
+
+        smtp_config = get_smtp_config()
+        if not smtp_config:
+            raise RuntimeError("Failed to get SMTP configuration")
+
+        sent = failed = 0
+        errors = send_batch([(recipient_email, message) for _, recipient_email, message in letters], smtp_config)
+        for (message_id, recipient_email, _), error in zip(letters, errors):
+            if error:
+                logger.error(f"Replay of email {message_id} to {recipient_email} failed: {str(error)}")
+                failed += 1
+                continue
+
+            with self._lock:
+                conn = self._connection()
+                conn.execute("DELETE FROM dead_letters WHERE id = ?", (message_id,))
+                conn.execute(
+                    "UPDATE outbox SET status = ?, last_error = NULL, updated_at = ? WHERE id = ?",
+                    (OUTBOX_SENT, time.time(), message_id)
+                )
+            sent += 1
+
+        return sent, failed
+
+
+# Global instance
+email_outbox = EmailOutbox()
+
+
+def main():
+    """Admin command line for the email outbox"""
+    parser = argparse.ArgumentParser(description="Confirmation email outbox administration")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    subparsers.add_parser("list-dead-letters", help="List messages that could not be delivered")
+    subparsers.add_parser("replay-dead-letters", help="Resend all dead letters through one SMTP connection")
+    args = parser.parse_args()
+
+    if args.command == "list-dead-letters":
+        for message_id, recipient_email, _ in email_outbox.dead_letters():
+            print(f"{message_id}\t{recipient_email}")
+    else:
+        sent, failed = email_outbox.replay_dead_letters()
+        print(f"Replayed dead letters: {sent} sent, {failed} failed")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,15 +1,53 @@
+import asyncio
 import smtplib
+import aiosmtplib
 import streamlit as st
 from email.mime.text import MIMEText
 from email.mime.multipart import MIMEMultipart
 from email.utils import formataddr
 import logging
+import os
+import re
+import threading
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass, field
 from datetime import datetime
+from profiler import timed
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# SMTP connection pool settings
+SMTP_POOL_SIZE = 3
+SMTP_POOL_ACQUIRE_TIMEOUT = 30
+SMTP_CONNECT_TIMEOUT = 20
+# Idle connections are NOOP-checked before reuse and closed when too old (seconds)
+SMTP_HEALTH_CHECK_AFTER = 5
+SMTP_MAX_IDLE = 120
+
+# Delivery engines: "pool" sends over pooled smtplib connections, "async" sends a
+# batch concurrently with aiosmtplib over at most ASYNC_CONCURRENCY connections
+DELIVERY_MODE_POOL = "pool"
+DELIVERY_MODE_ASYNC = "async"
+DEFAULT_ASYNC_CONCURRENCY = 3
+
+# How often the cached SMTP configuration is compared with the secrets (seconds)
+SMTP_CONFIG_RECHECK_INTERVAL = 30
+
+# Placeholders the email templates may use, and how they are written
+TEMPLATE_PLACEHOLDERS = {
+    "RECIPIENT_NAME", "TEAM_NAME", "SUBMISSION_TYPE", "TIMESTAMP",
+    "TEAM_DETAILS", "TEAM_LEAD_NAME", "TEAM_NAME_DETAILS", "MEMBER_DETAILS"
+}
+REQUIRED_TEMPLATE_PLACEHOLDERS = {"RECIPIENT_NAME", "TEAM_NAME"}
+PLACEHOLDER_PATTERN = re.compile(r"\{([^{}\s]+)\}")
+
+# Compiled templates per file: name -> (mtime, CompiledTemplate)
+_template_cache = {}
+_template_lock = threading.Lock()
+
 def load_email_template(template_name="lead_mail.txt"):
     """Load email template from file"""
     try:
@@ -22,122 +60,446 @@ def load_email_template(template_name="lead_mail.txt"):
         logger.error(f"Error loading email template {template_name}: {str(e)}")
         return None
 
-def get_smtp_config():
-    """Get SMTP configuration from Streamlit secrets"""
+class CompiledTemplate:
+    """Email template pre-split into literal segments and placeholder slots"""
+
+    def __init__(self, text):
+        # re.split with one group alternates literal text and placeholder names
+        parts = PLACEHOLDER_PATTERN.split(text)
+        unknown = set(parts[1::2]) - TEMPLATE_PLACEHOLDERS
+        if unknown:
+            raise ValueError(f"Unknown placeholders: {', '.join(sorted(unknown))}")
+        missing = REQUIRED_TEMPLATE_PLACEHOLDERS - set(parts[1::2])
+        if missing:
+            raise ValueError(f"Missing placeholders: {', '.join(sorted(missing))}")
+        self.parts = parts
+        self.placeholders = set(parts[1::2])
+
+    def render(self, values):
+        """Fill every slot in a single join"""
+        parts = list(self.parts)
+        parts[1::2] = [values[name] for name in parts[1::2]]
+        return "".join(parts)
+
+def get_email_template(template_name="lead_mail.txt"):
+    """Return the compiled template, recompiling only when the file changes"""
     try:
-        smtp_config = {
-            'server': st.secrets["email"]["SMTP_SERVER"],
-            'port': int(st.secrets["email"]["SMTP_PORT"]),
-            'username': st.secrets["email"]["SMTP_USERNAME"],
-            'password': st.secrets["email"]["SMTP_PASSWORD"],
-            'sender_name': st.secrets["email"]["SENDER_NAME"],
-            'sender_email': st.secrets["email"]["SENDER_EMAIL"]
+        mtime = os.stat(template_name).st_mtime
+    except FileNotFoundError:
+        logger.error(f"Email template file {template_name} not found")
+        return None
+    
+    with _template_lock:
+        cached = _template_cache.get(template_name)
+        if cached and cached[0] == mtime:
+            return cached[1]
+    
+    text = load_email_template(template_name)
+    if text is None:
+        return None
+    try:
+        template = CompiledTemplate(text)
+    except ValueError as e:
+        logger.error(f"Invalid email template {template_name}: {str(e)}")
+        return None
+    
+    with _template_lock:
+        _template_cache[template_name] = (mtime, template)
+    logger.info(f"Compiled email template {template_name}")
+    return template
+
+@dataclass(frozen=True)
+class SMTPConfig:
+    """Validated, immutable SMTP settings shared by every send"""
+    server: str
+    port: int
+    username: str
+    password: str = field(repr=False)
+    sender_name: str
+    sender_email: str
+    delivery_mode: str = DELIVERY_MODE_POOL
+    async_concurrency: int = DEFAULT_ASYNC_CONCURRENCY
+
+def load_smtp_config():
+    """Read and validate SMTP settings from Streamlit secrets (raises ValueError)"""
+    try:
+        section = st.secrets["email"]
+        values = {
+            'server': section["SMTP_SERVER"],
+            'port': section["SMTP_PORT"],
+            'username': section["SMTP_USERNAME"],
+            'password': section["SMTP_PASSWORD"],
+            'sender_name': section["SENDER_NAME"],
+            'sender_email': section["SENDER_EMAIL"],
+            'delivery_mode': section.get("DELIVERY_MODE", DELIVERY_MODE_POOL),
+            'async_concurrency': section.get("ASYNC_CONCURRENCY", DEFAULT_ASYNC_CONCURRENCY)
         }
-        return smtp_config
     except KeyError as e:
-        logger.error(f"Missing email configuration: {str(e)}")
+        raise ValueError(f"Missing email configuration: {str(e)}")
+    
+    try:
+        values['port'] = int(values['port'])
+        values['async_concurrency'] = int(values['async_concurrency'])
+    except (TypeError, ValueError):
+        raise ValueError("SMTP_PORT and ASYNC_CONCURRENCY must be integers")
+    
+    for key in ('server', 'username', 'password', 'sender_email'):
+        if not str(values[key]).strip():
+            raise ValueError(f"Email configuration value for {key} is empty")
+    if not 0 < values['port'] < 65536:
+        raise ValueError(f"Invalid SMTP_PORT: {values['port']}")
+    if "@" not in values['sender_email']:
+        raise ValueError(f"Invalid SENDER_EMAIL: {values['sender_email']}")
+    if values['delivery_mode'] not in (DELIVERY_MODE_POOL, DELIVERY_MODE_ASYNC):
+        raise ValueError(f"Invalid DELIVERY_MODE: {values['delivery_mode']}")
+    if values['async_concurrency'] < 1:
+        raise ValueError("ASYNC_CONCURRENCY must be at least 1")
+    
+    return SMTPConfig(**values)
+
+def _secrets_fingerprint():
+    """Cheap fingerprint of the email secrets, used to notice edits"""
+    return hash(tuple(sorted((key, str(value)) for key, value in st.secrets["email"].items())))
+
+def reload_smtp_config():
+    """Re-read SMTP settings (raises ValueError); connections for old settings are closed"""
+    global _smtp_config, _smtp_config_checked_at
+    with _smtp_config_lock:
+        _smtp_config_checked_at = time.monotonic()
+        previous = _smtp_config[1]
+        _smtp_config = (None, None)
+        config = load_smtp_config()
+        _smtp_config = (_secrets_fingerprint(), config)
+        if previous is not None and previous != config:
+            smtp_pool.close_all()
+            logger.info("SMTP configuration reloaded")
+        return config
+
+def get_smtp_config():
+    """Get the cached SMTP configuration, reloading it when the secrets change"""
+    global _smtp_config_checked_at
+    fingerprint, config = _smtp_config
+    try:
+        if config and time.monotonic() - _smtp_config_checked_at < SMTP_CONFIG_RECHECK_INTERVAL:
+            return config
+        if config and _secrets_fingerprint() == fingerprint:
+            _smtp_config_checked_at = time.monotonic()
+            return config
+        return reload_smtp_config()
+    except ValueError as e:
+        logger.error(str(e))
         return None
     except Exception as e:
         logger.error(f"Error getting SMTP configuration: {str(e)}")
         return None
 
+class SMTPConnectionPool:
+    """Process-wide pool of authenticated SMTP connections.
+
+    Connections are reused across messages and sessions, NOOP-checked when
+    they have been idle, and replaced when the server has dropped them.
+    """
+
+    def __init__(self, max_size=SMTP_POOL_SIZE):
+        self.max_size = max_size
+        self._idle = []  # (last_used, config key, connection)
+        self._in_use = 0
+        self._condition = threading.Condition()
+
+    @staticmethod
+    def _config_key(smtp_config):
+        return smtp_config
+
+    @staticmethod
+    def _open(smtp_config):
+        """Open, secure and authenticate a new SMTP connection"""
+        server = smtplib.SMTP(smtp_config.server, smtp_config.port, timeout=SMTP_CONNECT_TIMEOUT)
+        try:
+            server.starttls()
+            server.login(smtp_config.username, smtp_config.password)
+        except Exception:
+            _close_quietly(server)
+            raise
+        return server
+
+    @staticmethod
+    def _is_alive(server):
+        try:
+            return server.noop()[0] == 250
+        except (smtplib.SMTPException, OSError):
+            return False
+
+    def _checkout(self, smtp_config):
+        """Take a healthy idle connection, or open a new one within the size cap"""
+        key = self._config_key(smtp_config)
+        deadline = time.monotonic() + SMTP_POOL_ACQUIRE_TIMEOUT
+        with self._condition:
+            while not self._idle and self._in_use >= self.max_size:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    raise TimeoutError("Timed out waiting for a pooled SMTP connection")
+                self._condition.wait(remaining)
+            candidate = self._idle.pop() if self._idle else None
+            self._in_use += 1
+
+        try:
+            if candidate:
+                last_used, candidate_key, server = candidate
+                idle_for = time.monotonic() - last_used
+                usable = candidate_key == key and idle_for < SMTP_MAX_IDLE
+                if usable and (idle_for < SMTP_HEALTH_CHECK_AFTER or self._is_alive(server)):
+                    return server
+                _close_quietly(server)
+            return self._open(smtp_config)
+        except Exception:
+            self._release(None)
+            raise
+
+    def _release(self, server, smtp_config=None):
+        with self._condition:
+            self._in_use -= 1
+            if server is not None:
+                self._idle.append((time.monotonic(), self._config_key(smtp_config), server))
+            self._condition.notify()
+
+    @contextmanager
+    def connection(self, smtp_config):
+        """Borrow a connection; it is returned to the pool unless the block fails"""
+        server = self._checkout(smtp_config)
+        try:
+            yield server
+        except (smtplib.SMTPRecipientsRefused, smtplib.SMTPSenderRefused, smtplib.SMTPDataError):
+            # The server answered, so the connection itself is still usable
+            self._release(server, smtp_config)
+            raise
+        except Exception:
+            _close_quietly(server)
+            self._release(None)
+            raise
+        else:
+            self._release(server, smtp_config)
+
+    def close_all(self):
+        """Close every idle connection (e.g. after a configuration change)"""
+        with self._condition:
+            idle, self._idle = self._idle, []
+        for _, _, server in idle:
+            _close_quietly(server)
+
+
+def _close_quietly(server):
+    try:
+        server.quit()
+    except Exception:
+        try:
+            server.close()
+        except Exception:
+            pass
+
+
+# Global pool shared by all sessions
+smtp_pool = SMTPConnectionPool()
+
+# Cached (secrets fingerprint, SMTPConfig), loaded on first use or at startup
+_smtp_config = (None, None)
+_smtp_config_checked_at = 0.0
+_smtp_config_lock = threading.Lock()
+
 def create_email_content(recipient_name, team_name, submission_type, team_details=None, email_type="general"):
     """Create personalized email content based on email type"""
     
     # Determine which template to use
     if email_type == "team_member":
-        template = load_email_template("members_mail.txt")
+        template = get_email_template("members_mail.txt")
     else:
-        template = load_email_template("lead_mail.txt")
+        template = get_email_template("lead_mail.txt")
     
     if not template:
         return None
     
-    # Get current timestamp
-    current_time = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-    
-    # Replace common placeholders
-    content = template.replace("{RECIPIENT_NAME}", recipient_name)
-    content = content.replace("{TEAM_NAME}", team_name)
-    content = content.replace("{SUBMISSION_TYPE}", submission_type)
-    content = content.replace("{TIMESTAMP}", current_time)
+    # Common placeholders; team-specific ones default to empty (individual applications)
+    values = dict.fromkeys(TEMPLATE_PLACEHOLDERS, "")
+    values["RECIPIENT_NAME"] = recipient_name
+    values["TEAM_NAME"] = team_name
+    values["SUBMISSION_TYPE"] = submission_type
+    values["TIMESTAMP"] = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
     
     # Handle team-specific placeholders
     if team_details:
         if email_type == "team_member":
             # For team member template (template2)
-            team_lead_name = team_details.get('team_lead_name', 'Team Lead')
-            content = content.replace("{TEAM_LEAD_NAME}", team_lead_name)
-            content = content.replace("{TEAM_NAME_DETAILS}", team_details.get('team_name', 'Your Team'))
+            values["TEAM_LEAD_NAME"] = team_details.get('team_lead_name', 'Team Lead')
+            values["TEAM_NAME_DETAILS"] = team_details.get('team_name', 'Your Team')
             
             # Add member details section
-            member_details = f"""
+            values["MEMBER_DETAILS"] = f"""
 Your Details:
 - Name: {recipient_name}
 - Team: {team_details.get('team_name', 'N/A')}
 - Selected Role: {team_name}
 - Team Members: {team_details.get('member_count', 1)} members
             """
-            content = content.replace("{MEMBER_DETAILS}", member_details)
         else:
             # For general template (template1) - team lead
-            team_info = f"""
+            values["TEAM_DETAILS"] = f"""
 Team Name: {team_details['team_name']}
 Team Members: {team_details['member_count']} members
             """
-            content = content.replace("{TEAM_DETAILS}", team_info)
+    
+    return template.render(values)
+
+def build_confirmation_message(recipient_email, recipient_name, team_name, submission_type, team_details=None, email_type="general"):
+    """Render the confirmation email for a recipient (None if it cannot be built)"""
+    # Get SMTP configuration
+    smtp_config = get_smtp_config()
+    if not smtp_config:
+        logger.error("Failed to get SMTP configuration")
+        return None
+    
+    # Create email content
+    email_content = create_email_content(
+        recipient_name, team_name, submission_type, team_details, email_type
+    )
+    if not email_content:
+        logger.error("Failed to create email content")
+        return None
+    
+    # Create message
+    msg = MIMEMultipart()
+    msg['From'] = formataddr((smtp_config.sender_name, smtp_config.sender_email))
+    msg['To'] = recipient_email
+    
+    # Subject line based on submission type and email type
+    if submission_type == "Team":
+        if email_type == "team_member":
+            subject = f"Team Invitation - {team_name} | Knowledge Sharing Circle"
+        else:
+            subject = f"Team Application Confirmed - {team_name} | Knowledge Sharing Circle"
     else:
-        # Remove team-specific placeholders for individual applications
-        content = content.replace("{TEAM_DETAILS}", "")
-        content = content.replace("{TEAM_LEAD_NAME}", "")
-        content = content.replace("{TEAM_NAME_DETAILS}", "")
-        content = content.replace("{MEMBER_DETAILS}", "")
+        subject = f"Application Confirmed - {team_name} | Knowledge Sharing Circle"
+    
+    msg['Subject'] = subject
     
-    return content
+    # Attach email body
+    msg.attach(MIMEText(email_content, 'plain', 'utf-8'))
+    return msg
+
+async def _deliver_async(smtp_config, messages, concurrency):
+    """Send (recipient, message) pairs concurrently over up to ``concurrency`` connections"""
+    pending = asyncio.Queue()
+    for index, message in enumerate(messages):
+        pending.put_nowait((index, message))
+    results = [None] * len(messages)
+    
+    async def worker():
+        client = aiosmtplib.SMTP(
+            hostname=smtp_config.server,
+            port=smtp_config.port,
+            start_tls=True,
+            timeout=SMTP_CONNECT_TIMEOUT
+        )
+        try:
+            while not pending.empty():
+                index, (recipient_email, message_text) = pending.get_nowait()
+                try:
+                    if not client.is_connected:
+                        await client.connect()
+                        await client.login(smtp_config.username, smtp_config.password)
+                    await client.sendmail(smtp_config.sender_email, [recipient_email], message_text)
+                except Exception as e:
+                    results[index] = e
+        finally:
+            if client.is_connected:
+                try:
+                    await client.quit()
+                except Exception:
+                    client.close()
+    
+    await asyncio.gather(*(worker() for _ in range(min(concurrency, len(messages)))))
+    return results
+
+@timed("email_deliver")
+def deliver_messages(messages):
+    """Send rendered (recipient, message) pairs; returns one error (or None) per message"""
+    smtp_config = get_smtp_config()
+    if not smtp_config:
+        raise RuntimeError("Failed to get SMTP configuration")
+    
+    if smtp_config.delivery_mode == DELIVERY_MODE_ASYNC:
+        return asyncio.run(_deliver_async(smtp_config, messages, smtp_config.async_concurrency))
+    
+    return send_batch(messages, smtp_config)
+
+def send_batch(messages, smtp_config=None):
+    """Send (recipient, message) pairs through one authenticated session.
+    
+    Returns one error (or None) per message; a refused recipient is reported
+    for that message only and the rest of the batch is still sent.
+    """
+    smtp_config = smtp_config or get_smtp_config()
+    if not smtp_config:
+        raise RuntimeError("Failed to get SMTP configuration")
+    
+    results = [None] * len(messages)
+    index = 0
+    reconnected = False
+    while index < len(messages):
+        try:
+            with smtp_pool.connection(smtp_config) as server:
+                while index < len(messages):
+                    recipient_email, message_text = messages[index]
+                    try:
+                        refused = server.sendmail(smtp_config.sender_email, [recipient_email], message_text)
+                        if refused:
+                            results[index] = smtplib.SMTPRecipientsRefused(refused)
+                    except smtplib.SMTPRecipientsRefused as e:
+                        logger.error(f"Recipient email refused: {e.recipients}")
+                        results[index] = e
+                    except (smtplib.SMTPSenderRefused, smtplib.SMTPDataError) as e:
+                        logger.error(f"Message to {recipient_email} rejected: {str(e)}")
+                        results[index] = e
+                    index += 1
+        except smtplib.SMTPServerDisconnected as e:
+            # Resume the rest of the batch on a fresh connection, once
+            if reconnected:
+                results[index:] = [e] * (len(messages) - index)
+                break
+            logger.info("SMTP session dropped mid-batch, reconnecting")
+            reconnected = True
+        except Exception as e:
+            results[index:] = [e] * (len(messages) - index)
+            break
+    return results
+
+def deliver_message(recipient_email, message_text):
+    """Send one rendered message with the configured engine (raises on failure)"""
+    error = deliver_messages([(recipient_email, message_text)])[0]
+    if error:
+        raise error
+
+def is_permanent_failure(error):
+    """Whether a delivery error will not go away by retrying"""
+    if isinstance(error, (smtplib.SMTPRecipientsRefused, aiosmtplib.SMTPRecipientsRefused,
+                          aiosmtplib.SMTPRecipientRefused)):
+        return True
+    if isinstance(error, (smtplib.SMTPSenderRefused, smtplib.SMTPDataError)):
+        # 5xx replies are permanent, 4xx are transient
+        return 500 <= error.smtp_code < 600
+    if isinstance(error, (aiosmtplib.SMTPSenderRefused, aiosmtplib.SMTPDataError)):
+        return 500 <= error.code < 600
+    return False
 
 def send_confirmation_email(recipient_email, recipient_name, team_name, submission_type, team_details=None, email_type="general"):
     """Send confirmation email to the recipient"""
     try:
-        # Get SMTP configuration
-        smtp_config = get_smtp_config()
-        if not smtp_config:
-            logger.error("Failed to get SMTP configuration")
-            return False
-        
-        # Create email content
-        email_content = create_email_content(
-            recipient_name, team_name, submission_type, team_details, email_type
+        msg = build_confirmation_message(
+            recipient_email, recipient_name, team_name, submission_type, team_details, email_type
         )
-        if not email_content:
-            logger.error("Failed to create email content")
+        if not msg:
             return False
         
-        # Create message
-        msg = MIMEMultipart()
-        msg['From'] = formataddr((smtp_config['sender_name'], smtp_config['sender_email']))
-        msg['To'] = recipient_email
-        
-        # Subject line based on submission type and email type
-        if submission_type == "Team":
-            if email_type == "team_member":
-                subject = f"Team Invitation - {team_name} | Knowledge Sharing Circle"
-            else:
-                subject = f"Team Application Confirmed - {team_name} | Knowledge Sharing Circle"
-        else:
-            subject = f"Application Confirmed - {team_name} | Knowledge Sharing Circle"
-        
-        msg['Subject'] = subject
-        
-        # Attach email body
-        msg.attach(MIMEText(email_content, 'plain', 'utf-8'))
-        
-        # Send email
-        with smtplib.SMTP(smtp_config['server'], smtp_config['port']) as server:
-            server.starttls()
-            server.login(smtp_config['username'], smtp_config['password'])
-            
-            text = msg.as_string()
-            server.sendmail(smtp_config['sender_email'], recipient_email, text)
+        # Send email over a pooled, already authenticated connection
+        deliver_message(recipient_email, msg.as_string())
         
         logger.info(f"Confirmation email sent successfully to {recipient_email} (type: {email_type})")
         return True
@@ -155,6 +517,18 @@ def send_confirmation_email(recipient_email, recipient_name, team_name, submissi
         logger.error(f"Error sending email to {recipient_email}: {str(e)}")
         return False
 
+def validate_smtp_config():
+    """Load and validate the SMTP configuration so problems surface before anyone submits"""
+    if get_smtp_config():
+        return True, "Email configuration valid"
+    try:
+        reload_smtp_config()
+        return True, "Email configuration valid"
+    except ValueError as e:
+        return False, f"Invalid email configuration: {str(e)}"
+    except Exception as e:
+        return False, f"Email configuration could not be loaded: {str(e)}"
+
 def test_email_connection():
     """Test email connection and configuration"""
     try:
@@ -162,9 +536,9 @@ def test_email_connection():
         if not smtp_config:
             return False, "Failed to get SMTP configuration"
         
-        with smtplib.SMTP(smtp_config['server'], smtp_config['port']) as server:
+        with smtplib.SMTP(smtp_config.server, smtp_config.port) as server:
             server.starttls()
-            server.login(smtp_config['username'], smtp_config['password'])
+            server.login(smtp_config.username, smtp_config.password)
         
         return True, "Email connection successful"
         
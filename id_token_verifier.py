@@ -0,0 +1,142 @@
+import base64
+import logging
+import re
+import threading
+import time
+from typing import Any, Callable, Dict, Optional
+
+import requests
+from cryptography.hazmat.primitives import serialization
+from cryptography.hazmat.primitives.asymmetric.rsa import RSAPublicNumbers
+from google.auth import jwt
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+GOOGLE_JWKS_URL = "https://www.googleapis.com/oauth2/v3/certs"
+GOOGLE_ISSUERS = ("accounts.google.com", "https://accounts.google.com")
+
+# Key set lifetime when the response has no usable Cache-Control (seconds)
+DEFAULT_KEYS_MAX_AGE = 3600
+
+# Refresh in the background once this fraction of the lifetime has passed
+BACKGROUND_REFRESH_AT = 0.8
+
+# Minimum spacing between forced refreshes for unknown key IDs (seconds)
+UNKNOWN_KID_REFRESH_INTERVAL = 60
+
+# Clock skew tolerated when checking token timestamps (seconds)
+CLOCK_SKEW = 30
+
+MAX_AGE_PATTERN = re.compile(r"max-age=(\d+)")
+
+
+def _b64_to_int(value: str) -> int:
+    return int.from_bytes(base64.urlsafe_b64decode(value + "=" * (-len(value) % 4)), "big")
+
+
+def jwk_to_pem(key: Dict[str, Any]) -> str:
+    """Convert an RSA JWK into a PEM public key google.auth can verify with"""
+    public_key = RSAPublicNumbers(_b64_to_int(key["e"]), _b64_to_int(key["n"])).public_key()
+    return public_key.public_bytes(
+        serialization.Encoding.PEM, serialization.PublicFormat.SubjectPublicKeyInfo
+    ).decode("ascii")
+
+
+def cache_max_age(cache_control: Optional[str]) -> int:
+    """Lifetime in seconds from a Cache-Control header"""
+    match = MAX_AGE_PATTERN.search(cache_control or "")
+    return int(match.group(1)) if match else DEFAULT_KEYS_MAX_AGE
+
+
+class SigningKeyCache:
+    """Google's ID-token signing keys, cached for their Cache-Control lifetime.
+
+    Keys are refreshed in the background before they expire so verification
+    only blocks on the network when the cache is empty or fully stale.
+    """
+
+    def __init__(self, fetch: Optional[Callable[[], requests.Response]] = None):
+        self._fetch = fetch or self._fetch_from_google
+        self._session = requests.Session()
+        self._keys: Dict[str, str] = {}
+        self._fetched_at = 0.0
+        self._max_age = 0
+        self._forced_at = 0.0
+        self._lock = threading.Lock()
+        self._refreshing = False
+
+    def _fetch_from_google(self) -> requests.Response:
+        return self._session.get(GOOGLE_JWKS_URL, timeout=10)
+
+    def refresh(self):
+        """Download the current key set"""
+        response = self._fetch()
+        response.raise_for_status()
+        keys = {
+            key["kid"]: jwk_to_pem(key)
+            for key in response.json().get("keys", [])
+            if key.get("kty") == "RSA"
+        }
+        with self._lock:
+            self._keys = keys
+            self._fetched_at = time.monotonic()
+            self._max_age = cache_max_age(response.headers.get("Cache-Control"))
+        logger.info(f"Loaded {len(keys)} Google signing key(s), valid for {self._max_age}s")
+
+    def _refresh_in_background(self):
+        try:
+            self.refresh()
+        except Exception as e:
+            logger.error(f"Error refreshing Google signing keys: {str(e)}")
+        finally:
+            with self._lock:
+                self._refreshing = False
+
+    def get_keys(self, kid: Optional[str] = None) -> Dict[str, str]:
+        """Current key set, refreshing first only if it is expired or lacks ``kid``"""
+        with self._lock:
+            age = time.monotonic() - self._fetched_at
+            expired = not self._keys or age >= self._max_age
+            force = (
+                kid is not None and kid not in self._keys and not expired
+                and time.monotonic() - self._forced_at >= UNKNOWN_KID_REFRESH_INTERVAL
+            )
+            if force:
+                self._forced_at = time.monotonic()
+            start_background = (
+                not expired and not force and not self._refreshing
+                and age >= self._max_age * BACKGROUND_REFRESH_AT
+            )
+            if start_background:
+                self._refreshing = True
+
+        if expired or force:
+            # Google rotates keys ahead of use, so an unknown kid warrants one refresh
+            self.refresh()
+        elif start_background:
+            threading.Thread(
+                target=self._refresh_in_background, name="google-signing-keys", daemon=True
+            ).start()
+
+        with self._lock:
+            return self._keys
+
+    def verify(self, id_token: str, audience: str) -> Dict[str, Any]:
+        """Verify an ID token's signature, audience, issuer and expiry; return its claims"""
+        header = jwt.decode_header(id_token)
+        claims = jwt.decode(
+            id_token, certs=self.get_keys(header.get("kid")), audience=audience, clock_skew_in_seconds=CLOCK_SKEW
+        )
+        if claims.get("iss") not in GOOGLE_ISSUERS:
+            raise ValueError(f"Wrong issuer: {claims.get('iss')}")
+        return claims
+
+
+# Global instance
+signing_key_cache = SigningKeyCache()
+
+def verify_google_id_token(id_token: str, audience: str) -> Dict[str, Any]:
+    """Convenience function to verify a Google ID token against the cached signing keys"""
+    return signing_key_cache.verify(id_token, audience)
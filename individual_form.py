@@ -1,7 +1,7 @@
 import streamlit as st
-from utils import validate_form_data
-from email_service import send_confirmation_email
-from sheets_service import save_individual_response
+from utils import validate_form_data, invalidate_registrations
+from email_dispatcher import queue_confirmation_email
+from submission_journal import save_individual_response
 from datetime import datetime
 
 def individual_form(user_email):
@@ -51,24 +51,22 @@ def individual_form(user_email):
                 sheets_success = save_individual_response(response_data)
 
                 if sheets_success:
+                    email_jobs = []
                     try:
-                        # Send email with all selected teams
-                        email_sent = send_confirmation_email(
+                        # Queue email with all selected teams; it is sent in the background
+                        email_jobs.append(queue_confirmation_email(
                             recipient_email=user_email.lower(),
                             recipient_name=name.strip(),
                             team_name=", ".join(st.session_state.selectedTeams),  # Join multiple teams
                             submission_type="Individual"
-                        )
-                        st.session_state.form_submitted = True
-                        st.session_state.submission_type = "individual"
-                        st.session_state.selected_teams = st.session_state.selectedTeams
-                        st.session_state.email_sent = email_sent
-                        st.rerun()
+                        ))
                     except Exception as e:
-                        st.session_state.form_submitted = True
-                        st.session_state.submission_type = "individual"
-                        st.session_state.selected_teams = st.session_state.selectedTeams
-                        st.session_state.email_sent = False
-                        st.rerun()
+                        st.error(f"Email error: {str(e)}")
+                    invalidate_registrations()
+                    st.session_state.form_submitted = True
+                    st.session_state.submission_type = "individual"
+                    st.session_state.selected_teams = st.session_state.selectedTeams
+                    st.session_state.email_jobs = email_jobs
+                    st.rerun()
                 else:
                     st.error("❌ Failed to save application. Please try again.")
\ No newline at end of file
@@ -0,0 +1,96 @@
+import threading
+from collections import deque
+from typing import Any, Dict, List, Tuple
+
+# Recent observations kept per histogram for quantile estimates
+HISTOGRAM_WINDOW = 2048
+QUANTILES = (0.5, 0.95, 0.99)
+
+# Process-wide counters, gauges and histograms shared by all sessions
+_lock = threading.Lock()
+_counters: Dict[str, float] = {}
+_gauges: Dict[str, float] = {}
+_histograms: Dict[Tuple[str, Tuple[Tuple[str, str], ...]], Dict[str, Any]] = {}
+
+
+def increment(name: str, value: float = 1):
+    """Increase a counter"""
+    with _lock:
+        _counters[name] = _counters.get(name, 0) + value
+
+
+def set_gauge(name: str, value: float):
+    """Set a gauge to its current value"""
+    with _lock:
+        _gauges[name] = value
+
+
+def observe(name: str, value: float, **labels: str):
+    """Record one observation (e.g. a duration in seconds) in a histogram"""
+    key = (name, tuple(sorted(labels.items())))
+    with _lock:
+        histogram = _histograms.get(key)
+        if histogram is None:
+            histogram = _histograms[key] = {"count": 0, "sum": 0.0, "window": deque(maxlen=HISTOGRAM_WINDOW)}
+        histogram["count"] += 1
+        histogram["sum"] += value
+        histogram["window"].append(value)
+
+
+def _quantile(ordered: List[float], q: float) -> float:
+    """Nearest-rank quantile of an already sorted list"""
+    if not ordered:
+        return 0.0
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+def summaries() -> List[Dict[str, Any]]:
+    """Count, sum and p50/p95/p99 of every histogram, over its recent window"""
+    with _lock:
+        items = [(key, h["count"], h["sum"], list(h["window"])) for key, h in _histograms.items()]
+
+    results = []
+    for (name, labels), count, total, window in sorted(items):
+        window.sort()
+        results.append({
+            "name": name,
+            "labels": dict(labels),
+            "count": count,
+            "sum": total,
+            "quantiles": {q: _quantile(window, q) for q in QUANTILES}
+        })
+    return results
+
+
+def _label_text(labels: Dict[str, Any]) -> str:
+    if not labels:
+        return ""
+    pairs = ",".join(f'{k}="{str(v)}"' for k, v in labels.items())
+    return "{" + pairs + "}"
+
+
+def prometheus_text() -> str:
+    """All metrics in the Prometheus text exposition format"""
+    with _lock:
+        counters = dict(_counters)
+        gauges = dict(_gauges)
+
+    lines = []
+    for name, value in sorted(counters.items()):
+        lines.append(f"# TYPE {name} counter")
+        lines.append(f"{name} {value}")
+    for name, value in sorted(gauges.items()):
+        lines.append(f"# TYPE {name} gauge")
+        lines.append(f"{name} {value}")
+
+    typed = set()
+    for summary in summaries():
+        name = summary["name"]
+        if name not in typed:
+            typed.add(name)
+            lines.append(f"# TYPE {name} summary")
+        for q, value in summary["quantiles"].items():
+            lines.append(f"{name}{_label_text({**summary['labels'], 'quantile': q})} {value}")
+        lines.append(f"{name}_sum{_label_text(summary['labels'])} {summary['sum']}")
+        lines.append(f"{name}_count{_label_text(summary['labels'])} {summary['count']}")
+    return "\n".join(lines) + "\n"
@@ -0,0 +1,131 @@
+import functools
+import logging
+import os
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable, List
+
+import streamlit as st
+
+import metrics
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Histogram every timed phase is recorded in
+PHASE_METRIC = "rerun_phase_seconds"
+
+# How often the Prometheus text file is rewritten (seconds)
+EXPORT_INTERVAL = 15
+
+# The HTTP exporter has no auth, so it only listens locally unless configured otherwise
+DEFAULT_EXPORT_HOST = "127.0.0.1"
+
+# Off by default. The [profiling] secrets section sets enabled, export_file,
+# export_port, export_host and admin_emails (who may see the timing panel)
+_enabled = False
+_started = False
+_start_lock = threading.Lock()
+
+
+def is_enabled() -> bool:
+    return _enabled
+
+
+def set_enabled(enabled: bool):
+    """Turn span recording on or off for the whole process"""
+    global _enabled
+    _enabled = enabled
+
+
+def timed(phase: str) -> Callable:
+    """Decorator recording each call of a function as ``phase``; one flag check when off"""
+    def decorator(fn: Callable) -> Callable:
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            if not _enabled:
+                return fn(*args, **kwargs)
+            start = time.perf_counter()
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                metrics.observe(PHASE_METRIC, time.perf_counter() - start, phase=phase)
+        return wrapper
+    return decorator
+
+
+def write_prometheus_file(path: str):
+    """Atomically replace ``path`` with the current metrics"""
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w") as f:
+        f.write(metrics.prometheus_text())
+    os.replace(tmp_path, path)
+
+
+def _run_file_exporter(path: str):
+    while True:
+        try:
+            write_prometheus_file(path)
+        except Exception as e:
+            logger.error(f"Error writing metrics file {path}: {str(e)}")
+        time.sleep(EXPORT_INTERVAL)
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    """Serves the Prometheus text format on any path"""
+
+    def do_GET(self):
+        body = metrics.prometheus_text().encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def start_profiler():
+    """Read the [profiling] settings once and start any configured exporters"""
+    global _started
+    with _start_lock:
+        if _started:
+            return
+        _started = True
+
+        try:
+            settings = dict(st.secrets.get("profiling", {}))
+        except Exception:
+            settings = {}
+
+        set_enabled(bool(settings.get("enabled", False)))
+        if not _enabled:
+            return
+
+        export_file = settings.get("export_file")
+        if export_file:
+            threading.Thread(
+                target=_run_file_exporter, args=(export_file,), name="metrics-file-exporter", daemon=True
+            ).start()
+
+        export_port = settings.get("export_port")
+        if export_port:
+            export_host = settings.get("export_host", DEFAULT_EXPORT_HOST)
+            try:
+                server = ThreadingHTTPServer((export_host, int(export_port)), _MetricsHandler)
+                threading.Thread(target=server.serve_forever, name="metrics-http-exporter", daemon=True).start()
+                logger.info(f"Serving Prometheus metrics on {export_host}:{export_port}")
+            except Exception as e:
+                logger.error(f"Error starting metrics server on port {export_port}: {str(e)}")
+
+
+def is_admin(email: str) -> bool:
+    """Whether ``email`` may see the timing panel"""
+    try:
+        admins: List[str] = list(st.secrets.get("profiling", {}).get("admin_emails", []))
+    except Exception:
+        return False
+    return email.lower() in (admin.lower() for admin in admins)
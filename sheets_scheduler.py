@@ -0,0 +1,136 @@
+import logging
+import random
+import threading
+import time
+from typing import Any, Callable
+
+import requests
+from gspread.exceptions import APIError
+
+import metrics
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Google Sheets per-minute quotas (per service account); keep a little headroom
+READ_REQUESTS_PER_MINUTE = 55
+WRITE_REQUESTS_PER_MINUTE = 55
+BURST_SIZE = 10
+
+# Retry policy for quota (429) and server (5xx) errors; writes only retry quota
+# errors and connections that were never established
+MAX_RETRIES = 5
+BACKOFF_BASE = 1.0
+BACKOFF_MAX = 32.0
+RETRYABLE_STATUS_CODES = (429, 500, 502, 503, 504)
+
+READ = "read"
+WRITE = "write"
+
+
+def status_code(error: Exception):
+    """HTTP status of a Sheets error, or None if no response was received.
+
+    APIError.code is -1 whenever the error body is not JSON (e.g. the HTML
+    pages of front-end 502/503/504s), so the response status is used instead.
+    """
+    response = getattr(error, "response", None)
+    return getattr(response, "status_code", None)
+
+
+class TokenBucket:
+    """Token bucket refilled continuously at ``rate_per_minute``"""
+
+    def __init__(self, rate_per_minute: float, capacity: float):
+        self.rate = rate_per_minute / 60.0
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic()
+
+    def reserve(self) -> float:
+        """Take a token; return 0, or the seconds to wait before one is available"""
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        if self.tokens >= 1:
+            self.tokens -= 1
+            return 0.0
+        return (1 - self.tokens) / self.rate
+
+
+class SheetsScheduler:
+    """Paces every Google Sheets call through read/write token buckets.
+
+    Writes are admitted before waiting reads. Reads are retried on quota,
+    server and connection errors, writes only when the request cannot have
+    been applied; both back off exponentially with jitter.
+    """
+
+    def __init__(self, read_rate: float = READ_REQUESTS_PER_MINUTE,
+                 write_rate: float = WRITE_REQUESTS_PER_MINUTE, burst: float = BURST_SIZE):
+        self._buckets = {
+            READ: TokenBucket(read_rate, burst),
+            WRITE: TokenBucket(write_rate, burst)
+        }
+        self._waiting = {READ: 0, WRITE: 0}
+        self._condition = threading.Condition()
+
+    def read(self, fn: Callable, *args, **kwargs) -> Any:
+        """Run a read call (lookups, metadata) through the read bucket"""
+        return self._call(READ, fn, *args, **kwargs)
+
+    def write(self, fn: Callable, *args, **kwargs) -> Any:
+        """Run a write call (appends, updates, merges) through the write bucket"""
+        return self._call(WRITE, fn, *args, **kwargs)
+
+    def _call(self, kind: str, fn: Callable, *args, **kwargs) -> Any:
+        attempt = 0
+        while True:
+            self._acquire(kind)
+            try:
+                return fn(*args, **kwargs)
+            except (APIError, requests.exceptions.ConnectionError, requests.exceptions.Timeout) as e:
+                code = status_code(e)
+                if kind == WRITE:
+                    # Appends are not idempotent: a 5xx or dropped connection may come after the
+                    # server applied the write, so only retry when it certainly did not
+                    retryable = code == 429 or isinstance(e, requests.exceptions.ConnectTimeout)
+                else:
+                    retryable = code in RETRYABLE_STATUS_CODES or not isinstance(e, APIError)
+                if not retryable or attempt >= MAX_RETRIES:
+                    raise
+
+                delay = min(BACKOFF_MAX, BACKOFF_BASE * (2 ** attempt))
+                delay = random.uniform(0, delay)
+                attempt += 1
+                metrics.increment(f"sheets_{kind}_retries_total")
+                logger.warning(
+                    f"Sheets {kind} failed ({code or type(e).__name__}), "
+                    f"retry {attempt}/{MAX_RETRIES} in {delay:.1f}s"
+                )
+                time.sleep(delay)
+
+    def _acquire(self, kind: str):
+        """Block until the bucket for ``kind`` grants a token"""
+        throttled = False
+        with self._condition:
+            self._waiting[kind] += 1
+            metrics.set_gauge(f"sheets_{kind}_queue_depth", self._waiting[kind])
+            try:
+                while True:
+                    # Lookups yield to any write that is waiting for its turn
+                    if kind == READ and self._waiting[WRITE] > 0:
+                        wait = 0.05
+                    else:
+                        wait = self._buckets[kind].reserve()
+                        if wait == 0:
+                            return
+                    if not throttled:
+                        throttled = True
+                        metrics.increment(f"sheets_{kind}_throttled_total")
+                    self._condition.wait(wait)
+            finally:
+                self._waiting[kind] -= 1
+                metrics.set_gauge(f"sheets_{kind}_queue_depth", self._waiting[kind])
+                self._condition.notify_all()
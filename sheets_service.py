@@ -2,8 +2,19 @@ import gspread
 import streamlit as st
 from datetime import datetime
 import logging
-from typing import List, Dict, Any
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+from typing import List, Dict, Any, Callable, Optional, Tuple
+import requests
+from google.auth.transport.requests import AuthorizedSession
 from google.oauth2.service_account import Credentials
+from requests.adapters import HTTPAdapter
+from gspread.exceptions import APIError
+from gspread.utils import InsertDataOption, a1_range_to_grid_range, rowcol_to_a1
+import metrics
+from profiler import timed
+from sheets_scheduler import SheetsScheduler, status_code
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
@@ -13,10 +24,402 @@ logger = logging.getLogger(__name__)
 INDIVIDUAL_SHEET_ID = "15R_7NwIfIq66pWApCNtY3xhNR9OLA4UIP5KeKehIaQg"
 TEAM_SHEET_ID = "14wBeJQRbHDki2meDxUEITmBoCYa9GfuwgcNMFEYlK8Q"
 
+# Shared HTTP connection pool size for the gspread client
+HTTP_POOL_SIZE = 10
+
+# Backoff between client initialization attempts after a failure (seconds)
+CLIENT_INIT_BACKOFF_BASE = 5
+CLIENT_INIT_BACKOFF_MAX = 300
+
+# Registration index refresh intervals (seconds)
+REGISTRATION_SYNC_INTERVAL = 30
+REGISTRATION_FULL_RESYNC_INTERVAL = 600
+
+# Both sheets are synced concurrently; each source gets its own deadline (seconds)
+REGISTRATION_FETCH_WORKERS = 5
+REGISTRATION_FETCH_TIMEOUTS = {
+    INDIVIDUAL_SHEET_ID: 10,
+    TEAM_SHEET_ID: 10
+}
+
+# How long opened spreadsheet/worksheet handles are reused (seconds)
+WORKSHEET_CACHE_TTL = 300
+
+# Bump when the sheet headers change so cached header checks are redone
+HEADERS_SCHEMA_VERSION = 1
+
+# Columns read by registration lookups, in the order of the indexed tuples:
+# (email, timestamp, selected team, team name, member count, comments)
+LOOKUP_FIELDS = {
+    INDIVIDUAL_SHEET_ID: ("Email", "Timestamp", "Selected Team", None, None, "Feedback"),
+    TEAM_SHEET_ID: ("Email", "Timestamp", "Selected Team", "Team Name", "Member Count", "Comments")
+}
+
+# Team information columns merged across all rows of a team
+TEAM_MERGED_COLUMNS = ["A", "B", "C", "D", "E"]
+
+# Outcomes of a write, telling callers whether sending it again could duplicate rows
+WRITE_OK = "ok"
+WRITE_UNAVAILABLE = "unavailable"  # Not applied (client down, quota, access); safe to resend
+WRITE_REJECTED = "rejected"        # Refused as invalid; resending the same rows fails again
+WRITE_UNKNOWN = "unknown"          # May have been applied (5xx, read timeout, dropped connection)
+
+# Status codes for which the request was certainly not applied and may succeed later
+UNAVAILABLE_STATUS_CODES = {401, 403, 404, 408, 429}
+
+
+def _split_teams(selected_team: str) -> List[str]:
+    """Split a stored 'Selected Team' value into a list of teams"""
+    # Handle multiple teams (stored as comma-separated or single team)
+    if "," in selected_team:
+        return [t.strip() for t in selected_team.split(",")]
+    return [selected_team] if selected_team else []
+
+
+def _parse_row_span(updated_range: str) -> Tuple[int, int]:
+    """Return the first and last row numbers of an A1 range such as 'Sheet1'!A5:J9"""
+    grid_range = a1_range_to_grid_range(updated_range.rsplit("!", 1)[-1])
+    return grid_range["startRowIndex"] + 1, grid_range["endRowIndex"]
+
+
+def _write_outcome(error: Exception) -> str:
+    """Classify an exception raised while sending a write"""
+    if isinstance(error, gspread.exceptions.SpreadsheetNotFound):
+        return WRITE_UNAVAILABLE
+    if isinstance(error, APIError):
+        code = status_code(error)
+        if code in UNAVAILABLE_STATUS_CODES:
+            return WRITE_UNAVAILABLE
+        if code is not None and 400 <= code < 500:
+            return WRITE_REJECTED
+        return WRITE_UNKNOWN
+    if isinstance(error, requests.exceptions.ConnectTimeout):
+        return WRITE_UNAVAILABLE
+    return WRITE_UNKNOWN
+
+
+def _merge_request(sheet_id: int, a1_range: str) -> Dict[str, Any]:
+    """Build a batch_update mergeCells request for an A1 range"""
+    return {
+        "mergeCells": {
+            "range": a1_range_to_grid_range(a1_range, sheet_id),
+            "mergeType": "MERGE_ALL"
+        }
+    }
+
+
+class WorksheetCache:
+    """Thread-safe cache of spreadsheet/worksheet handles shared by all sessions.
+
+    Entries are keyed by spreadsheet ID and worksheet index and expire after
+    ``ttl`` seconds; they are dropped early on 404/permission errors.
+    """
+
+    def __init__(self, ttl: float = WORKSHEET_CACHE_TTL):
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._handles = {}
+
+    def get(self, spreadsheet_id: str, index: int, open_handles: Callable[[], Tuple[Any, Any]]):
+        """Return (spreadsheet, worksheet), calling ``open_handles`` only on a miss"""
+        key = (spreadsheet_id, index)
+        now = time.monotonic()
+        with self._lock:
+            cached = self._handles.get(key)
+        if cached and now - cached[0] < self.ttl:
+            metrics.increment("sheets_handle_cache_hits_total")
+            return cached[1], cached[2]
+
+        metrics.increment("sheets_handle_cache_misses_total")
+        spreadsheet, worksheet = open_handles()
+        with self._lock:
+            self._handles[key] = (now, spreadsheet, worksheet)
+        return spreadsheet, worksheet
+
+    def invalidate(self, spreadsheet_id: str = None):
+        """Drop cached handles for one spreadsheet (or all of them)"""
+        with self._lock:
+            for key in list(self._handles):
+                if spreadsheet_id is None or key[0] == spreadsheet_id:
+                    del self._handles[key]
+        metrics.increment("sheets_handle_cache_invalidations_total")
+
+
+class RegistrationIndex:
+    """Process-wide index of registrations keyed by lowercased email.
+
+    The index is built once from both sheets and then kept fresh by fetching
+    only the rows appended since the last sync, so lookups are dict hits.
+    """
+
+    def __init__(self, sync_interval: float = REGISTRATION_SYNC_INTERVAL,
+                 full_resync_interval: float = REGISTRATION_FULL_RESYNC_INTERVAL):
+        self.sync_interval = sync_interval
+        self.full_resync_interval = full_resync_interval
+        self._lock = threading.Lock()
+        self._sync_lock = threading.Lock()
+        # A fetch that outlives its timeout keeps its sheet lock until it finishes
+        self._sheet_locks = {INDIVIDUAL_SHEET_ID: threading.Lock(), TEAM_SHEET_ID: threading.Lock()}
+        self._fetch_pool = ThreadPoolExecutor(
+            max_workers=REGISTRATION_FETCH_WORKERS, thread_name_prefix="registration-fetch"
+        )
+        # Email -> list of (row number, timestamp, selected team, team name, member count, comments)
+        self._entries = {INDIVIDUAL_SHEET_ID: {}, TEAM_SHEET_ID: {}}
+        self._headers = {INDIVIDUAL_SHEET_ID: [], TEAM_SHEET_ID: []}
+        # Number of sheet rows (including the header row) already indexed
+        self._synced_rows = {INDIVIDUAL_SHEET_ID: 0, TEAM_SHEET_ID: 0}
+        self._last_sync = 0.0
+        self._last_full_sync = 0.0
+        self._built = False
+        # Whether a background sync is queued or running
+        self._refreshing = False
+        # Bumped by mark_stale so a sync already under way does not hide a newer write
+        self._stale_marks = 0
+        # Whether the last sync of each sheet completed; lookups are partial otherwise
+        self._complete = {INDIVIDUAL_SHEET_ID: False, TEAM_SHEET_ID: False}
+        # Fetches started before a rebuild request must not write into the index
+        self._generation = 0
+
+    def reset(self):
+        """Rebuild from scratch on the next sync (e.g. after a header rewrite).
+
+        The current index keeps serving lookups until the rebuild succeeds.
+        """
+        with self._lock:
+            self._generation += 1
+            self._last_sync = 0.0
+            self._last_full_sync = 0.0
+
+    def mark_stale(self):
+        """Make the next lookup fetch newly appended rows"""
+        with self._lock:
+            self._last_sync = 0.0
+            self._stale_marks += 1
+
+    def is_stale(self) -> bool:
+        return time.monotonic() - self._last_sync >= self.sync_interval
+
+    def sync(self, service: "SheetsService", wait: bool = False):
+        """Bring the index up to date when it is stale.
+
+        Only the first build (or a caller passing ``wait``) blocks; later syncs
+        run on the fetch pool while lookups keep using the current index.
+        """
+        if not self.is_stale():
+            return
+
+        if self._built and not wait:
+            with self._lock:
+                if self._refreshing:
+                    return
+                self._refreshing = True
+            try:
+                self._fetch_pool.submit(self._run_background_sync, service)
+            except Exception:
+                with self._lock:
+                    self._refreshing = False
+                raise
+            return
+
+        self._sync_now(service)
+
+    def _run_background_sync(self, service: "SheetsService"):
+        try:
+            self._sync_now(service)
+        except Exception as e:
+            logger.error(f"Error syncing registration index: {str(e)}")
+        finally:
+            with self._lock:
+                self._refreshing = False
+
+    def _sync_now(self, service: "SheetsService"):
+        """Fetch rows appended since the last sync (or rebuild when due)"""
+        with self._sync_lock:
+            if not self.is_stale():
+                return
+
+            now = time.monotonic()
+            with self._lock:
+                stale_marks = self._stale_marks
+            # A rebuild fetches each sheet into a fresh index that replaces the old one
+            # only when it succeeds, so lookups never see a half-built index
+            full = now - self._last_full_sync >= self.full_resync_interval
+
+            # Fetch both sheets concurrently so login latency is the slower of the two
+            futures = {
+                sheet_id: self._fetch_pool.submit(self._sync_sheet, service, sheet_id, full)
+                for sheet_id in (INDIVIDUAL_SHEET_ID, TEAM_SHEET_ID)
+            }
+            complete = {}
+            for sheet_id, future in futures.items():
+                timeout = max(0.0, now + REGISTRATION_FETCH_TIMEOUTS[sheet_id] - time.monotonic())
+                try:
+                    complete[sheet_id] = future.result(timeout=timeout)
+                except FutureTimeoutError:
+                    logger.warning(f"Timed out syncing registration index for sheet {sheet_id}")
+                    complete[sheet_id] = False
+                except Exception as e:
+                    service._handle_sheet_error(sheet_id, e)
+                    logger.error(f"Error syncing registration index for sheet {sheet_id}: {str(e)}")
+                    complete[sheet_id] = False
+
+            with self._lock:
+                self._complete.update(complete)
+                if full:
+                    self._last_full_sync = now
+                self._built = True
+                # Rows written after this sync started still need fetching
+                self._last_sync = now if stale_marks == self._stale_marks else 0.0
+
+    def _sync_sheet(self, service: "SheetsService", sheet_id: str, full: bool) -> bool:
+        """Index the rows of one sheet appended since the last sync, or all of them"""
+        # A previous fetch that timed out may still be running for this sheet
+        if not self._sheet_locks[sheet_id].acquire(blocking=False):
+            return False
+        try:
+            return self._fetch_appended_rows(service, sheet_id, full)
+        finally:
+            self._sheet_locks[sheet_id].release()
+
+    def _fetch_appended_rows(self, service: "SheetsService", sheet_id: str, full: bool = False) -> bool:
+        """Fetch and index new rows; False if a reset made the result obsolete"""
+        with self._lock:
+            generation = self._generation
+            headers = [] if full else self._headers[sheet_id]
+            synced_rows = 0 if full else self._synced_rows[sheet_id]
+
+        _, worksheet = service._open_worksheet(sheet_id)
+        if not headers:
+            headers = service.scheduler.read(worksheet.row_values, 1)
+            if not headers:
+                if full:
+                    with self._lock:
+                        if generation != self._generation:
+                            return False
+                        self._entries[sheet_id] = {}
+                        self._synced_rows[sheet_id] = 0
+                return True
+            synced_rows = 1
+
+        # Only the columns used by lookups are fetched, one ranged read per column
+        columns = [
+            rowcol_to_a1(1, headers.index(field) + 1)[:-1] if field in headers else None
+            for field in LOOKUP_FIELDS[sheet_id]
+        ]
+        fetched = [column for column in columns if column]
+        first_row = synced_rows + 1
+        value_ranges = service.scheduler.read(
+            worksheet.batch_get, [f"{column}{first_row}:{column}" for column in fetched]
+        )
+        column_values = dict(zip(fetched, value_ranges))
+
+        row_count = max((len(values) for values in value_ranges), default=0)
+        projected = []
+        for column in columns:
+            values = column_values.get(column, [])
+            projected.append([
+                values[i][0] if i < len(values) and values[i] else ""
+                for i in range(row_count)
+            ])
+
+        new_entries = {}
+        for offset, (email, *fields) in enumerate(zip(*projected)):
+            email = email.lower()
+            if email:
+                new_entries.setdefault(email, []).append((first_row + offset, *fields))
+
+        with self._lock:
+            if generation != self._generation:
+                return False
+            self._headers[sheet_id] = headers
+            if full:
+                # Swap the rebuilt sheet in whole
+                self._entries[sheet_id] = new_entries
+            else:
+                entries = self._entries[sheet_id]
+                for email, rows in new_entries.items():
+                    entries.setdefault(email, []).extend(rows)
+
+            self._synced_rows[sheet_id] = synced_rows + row_count
+        return True
+
+    def lookup(self, email: str) -> Dict[str, Any]:
+        """Return the registrations indexed for an email address"""
+        key = email.lower()
+        with self._lock:
+            individual_entries = list(self._entries[INDIVIDUAL_SHEET_ID].get(key, ()))
+            team_entries = list(self._entries[TEAM_SHEET_ID].get(key, ()))
+            partial = not all(self._complete.values())
+
+        registrations = []
+        all_teams = []
+
+        for row_number, timestamp, selected_team, _, _, comments in individual_entries:
+            teams = _split_teams(selected_team)
+            all_teams.extend(teams)
+            registrations.append({
+                "id": row_number - 1,
+                "type": "individual",
+                "teams": teams,
+                "timestamp": timestamp,
+                "comments": comments
+            })
+
+        processed_teams = set()  # To avoid duplicate team entries
+        for _, timestamp, selected_team, team_name, member_count, comments in team_entries:
+            team_id = f"{team_name}_{timestamp}"
+            if team_id in processed_teams:
+                continue
+
+            teams = _split_teams(selected_team)
+            all_teams.extend(teams)
+            registrations.append({
+                "id": len(registrations) + 1,
+                "type": "team",
+                "teams": teams,
+                "team_name": team_name,
+                "member_count": member_count,
+                "timestamp": timestamp,
+                "comments": comments
+            })
+            processed_teams.add(team_id)
+
+        # Remove duplicates from all_teams
+        unique_teams = list(set(all_teams))
+
+        return {
+            "found": len(registrations) > 0,
+            "teams": unique_teams,
+            "registrations": registrations,
+            "partial": partial
+        }
+
+
 class SheetsService:
     def __init__(self):
-        self.client = None
-        self._initialize_client()
+        # The gspread client is created lazily on first use and shared by all sessions
+        self._client = None
+        self._client_lock = threading.Lock()
+        self._client_init_failures = 0
+        self._next_client_init = 0.0
+        self.registration_index = RegistrationIndex()
+        self.worksheet_cache = WorksheetCache()
+        # Every Google Sheets call is paced and retried through the scheduler
+        self.scheduler = SheetsScheduler()
+        # Serializes team append + merge sequences within this process
+        self._team_write_lock = threading.Lock()
+        # (spreadsheet id, worksheet id) -> schema version whose headers were verified
+        self._verified_headers = {}
+    
+    @property
+    def client(self):
+        """The shared gspread client, initialized on first use (None while unavailable)"""
+        if self._client is None:
+            with self._client_lock:
+                # Re-check under the lock so concurrent first calls initialize only once
+                if self._client is None and time.monotonic() >= self._next_client_init:
+                    self._initialize_client()
+        return self._client
     
     def _initialize_client(self):
         """Initialize Google Sheets client using service account credentials"""
@@ -42,125 +445,141 @@ class SheetsService:
             # Create credentials
             credentials = Credentials.from_service_account_info(credentials_info, scopes=scopes)
             
+            # Share one pooled HTTP session across all sessions and threads
+            session = AuthorizedSession(credentials)
+            adapter = HTTPAdapter(pool_connections=HTTP_POOL_SIZE, pool_maxsize=HTTP_POOL_SIZE)
+            session.mount("https://", adapter)
+            
             # Initialize gspread client
-            self.client = gspread.authorize(credentials)
+            self._client = gspread.authorize(credentials, session=session)
+            self._client_init_failures = 0
             logger.info("Google Sheets client initialized successfully")
             
         except Exception as e:
-            logger.error(f"Failed to initialize Google Sheets client: {str(e)}")
-            self.client = None
+            # Retry on a later call, backing off while the failure persists
+            delay = min(CLIENT_INIT_BACKOFF_MAX, CLIENT_INIT_BACKOFF_BASE * (2 ** self._client_init_failures))
+            self._client_init_failures += 1
+            self._next_client_init = time.monotonic() + delay
+            logger.error(f"Failed to initialize Google Sheets client (retrying in {delay}s): {str(e)}")
+            self._client = None
     
     def _ensure_headers(self, worksheet, headers: List[str]):
-        """Ensure the worksheet has the correct headers"""
+        """Ensure the worksheet has the correct headers (verified once per process)"""
+        key = (worksheet.spreadsheet_id, worksheet.id)
+        if self._verified_headers.get(key) == HEADERS_SCHEMA_VERSION:
+            return
+        
         try:
             # Get current headers
-            current_headers = worksheet.row_values(1)
+            current_headers = self.scheduler.read(worksheet.row_values, 1)
             
-            # If no headers or headers don't match, update them
+            # If no headers or headers don't match, rewrite the header row in place
             if not current_headers or current_headers != headers:
-                worksheet.clear()
-                worksheet.append_row(headers)
+                self.scheduler.write(worksheet.update, [headers], "A1")
+                self.registration_index.reset()
                 logger.info(f"Headers updated for worksheet: {worksheet.title}")
+            
+            self._verified_headers[key] = HEADERS_SCHEMA_VERSION
                 
         except Exception as e:
             logger.error(f"Error ensuring headers: {str(e)}")
             raise
     
+    def _invalidate_headers(self, spreadsheet_id: str):
+        """Re-verify headers on the next write to this spreadsheet (e.g. after a write error)"""
+        for key in [k for k in self._verified_headers if k[0] == spreadsheet_id]:
+            self._verified_headers.pop(key, None)
+    
+    def _open_worksheet(self, spreadsheet_id: str, index: int = 0):
+        """Return cached (spreadsheet, worksheet) handles for a sheet"""
+        def open_handles():
+            spreadsheet = self.scheduler.read(self.client.open_by_key, spreadsheet_id)
+            return spreadsheet, self.scheduler.read(spreadsheet.get_worksheet, index)
+        
+        return self.worksheet_cache.get(spreadsheet_id, index, open_handles)
+    
+    def _handle_sheet_error(self, spreadsheet_id: str, error: Exception):
+        """Drop cached state for a spreadsheet after a failed call"""
+        self._invalidate_headers(spreadsheet_id)
+        # Missing sheet or revoked access: the cached handle is no longer usable
+        if isinstance(error, (APIError, gspread.exceptions.SpreadsheetNotFound)):
+            code = status_code(error) if isinstance(error, APIError) else 404
+            if code in (403, 404):
+                self.worksheet_cache.invalidate(spreadsheet_id)
+    
     def check_existing_registrations(self, email: str) -> Dict[str, Any]:
         """Check if email exists in either individual or team sheets"""
         try:
             if not self.client:
                 logger.error("Google Sheets client not initialized")
-                return {"found": False, "teams": [], "registrations": []}
-            
-            registrations = []
-            all_teams = []
-            
-            # Check individual sheet
-            try:
-                individual_sheet = self.client.open_by_key(INDIVIDUAL_SHEET_ID)
-                individual_worksheet = individual_sheet.get_worksheet(0)
-                individual_records = individual_worksheet.get_all_records()
-                
-                for i, record in enumerate(individual_records):
-                    if record.get("Email", "").lower() == email.lower():
-                        # Handle multiple teams (stored as comma-separated or single team)
-                        selected_team = record.get("Selected Team", "")
-                        if "," in selected_team:
-                            teams = [t.strip() for t in selected_team.split(",")]
-                        else:
-                            teams = [selected_team] if selected_team else []
-                        
-                        all_teams.extend(teams)
-                        registrations.append({
-                            "id": i + 1,
-                            "type": "individual",
-                            "teams": teams,
-                            "timestamp": record.get("Timestamp", ""),
-                            "comments": record.get("Feedback", "")
-                        })
-                
-            except Exception as e:
-                logger.error(f"Error checking individual sheet: {str(e)}")
+                return {"found": False, "teams": [], "registrations": [], "partial": True}
             
-            # Check team sheet
-            try:
-                team_sheet = self.client.open_by_key(TEAM_SHEET_ID)
-                team_worksheet = team_sheet.get_worksheet(0)
-                team_records = team_worksheet.get_all_records()
-                
-                processed_teams = set()  # To avoid duplicate team entries
-                
-                for record in team_records:
-                    if record.get("Email", "").lower() == email.lower():
-                        team_id = f"{record.get('Team Name', '')}_{record.get('Timestamp', '')}"
-                        
-                        if team_id not in processed_teams:
-                            # Handle multiple teams (stored as comma-separated or single team)
-                            selected_team = record.get("Selected Team", "")
-                            if "," in selected_team:
-                                teams = [t.strip() for t in selected_team.split(",")]
-                            else:
-                                teams = [selected_team] if selected_team else []
-                            
-                            all_teams.extend(teams)
-                            registrations.append({
-                                "id": len(registrations) + 1,
-                                "type": "team",
-                                "teams": teams,
-                                "team_name": record.get("Team Name", ""),
-                                "member_count": record.get("Member Count", 1),
-                                "timestamp": record.get("Timestamp", ""),
-                                "comments": record.get("Comments", "")
-                            })
-                            processed_teams.add(team_id)
-                
-            except Exception as e:
-                logger.error(f"Error checking team sheet: {str(e)}")
+            # Only rows appended since the last sync are fetched, and only when stale
+            self.registration_index.sync(self)
+            return self.registration_index.lookup(email)
             
-            # Remove duplicates from all_teams
-            unique_teams = list(set(all_teams))
+        except Exception as e:
+            logger.error(f"Error checking existing registrations: {str(e)}")
+            return {"found": False, "teams": [], "registrations": [], "partial": True}
+    
+    def sync_registrations(self):
+        """Fetch rows written since the last sync into the registration index, waiting for the result"""
+        try:
+            if self.client:
+                self.registration_index.mark_stale()
+                self.registration_index.sync(self, wait=True)
+        except Exception as e:
+            logger.error(f"Error syncing registrations: {str(e)}")
+    
+    def find_submission(self, kind: str, email: str, timestamp: str) -> Optional[bool]:
+        """Whether the last sync saw a submission in its sheet; None if the sync was incomplete"""
+        try:
+            if not self.client:
+                return None
             
-            return {
-                "found": len(registrations) > 0,
-                "teams": unique_teams,
-                "registrations": registrations
-            }
+            result = self.registration_index.lookup(email)
+            if any(reg["type"] == kind and reg["timestamp"] == timestamp for reg in result["registrations"]):
+                return True
+            return None if result["partial"] else False
             
         except Exception as e:
-            logger.error(f"Error checking existing registrations: {str(e)}")
-            return {"found": False, "teams": [], "registrations": []}
+            logger.error(f"Error looking up {kind} submission for {email}: {str(e)}")
+            return None
     
     def save_individual_response(self, response_data: Dict[str, Any]) -> bool:
         """Save individual response to Google Sheets"""
+        return self.save_individual_responses([response_data]) == WRITE_OK
+    
+    @timed("sheets_save_individual")
+    def save_individual_responses(self, responses: List[Dict[str, Any]]) -> str:
+        """Save a batch of individual responses to Google Sheets in one append; returns a WRITE_* outcome"""
+        try:
+            rows = []
+            for response_data in responses:
+                # Convert selected teams list to comma-separated string
+                selected_teams_str = ", ".join(response_data["selected_teams"])
+                
+                # Prepare row data
+                rows.append([
+                    response_data["timestamp"],
+                    response_data["name"],
+                    response_data["crn"],
+                    response_data["contact"],
+                    response_data["email"],
+                    selected_teams_str,  # Multiple teams as comma-separated
+                    response_data["comments"]
+                ])
+        except Exception as e:
+            logger.error(f"Invalid individual response: {str(e)}")
+            return WRITE_REJECTED
+        
         try:
             if not self.client:
                 logger.error("Google Sheets client not initialized")
-                return False
+                return WRITE_UNAVAILABLE
             
             # Open the individual responses sheet
-            sheet = self.client.open_by_key(INDIVIDUAL_SHEET_ID)
-            worksheet = sheet.get_worksheet(0)
+            sheet, worksheet = self._open_worksheet(INDIVIDUAL_SHEET_ID)
             
             # Define headers for individual responses
             headers = [
@@ -171,53 +590,29 @@ class SheetsService:
             # Ensure headers are correct
             self._ensure_headers(worksheet, headers)
             
-            # Convert selected teams list to comma-separated string
-            selected_teams_str = ", ".join(response_data["selected_teams"])
-            
-            # Prepare row data
-            row_data = [
-                response_data["timestamp"],
-                response_data["name"],
-                response_data["crn"],
-                response_data["contact"],
-                response_data["email"],
-                selected_teams_str,  # Multiple teams as comma-separated
-                response_data["comments"]
-            ]
-            
-            # Append the row
-            worksheet.append_row(row_data)
-            logger.info(f"Individual response saved for: {response_data['name']}")
-            return True
+        except Exception as e:
+            self._handle_sheet_error(INDIVIDUAL_SHEET_ID, e)
+            logger.error(f"Error preparing individual response sheet: {str(e)}")
+            return WRITE_UNAVAILABLE
+        
+        try:
+            # Append all rows in a single call
+            self.scheduler.write(worksheet.append_rows, rows)
             
         except Exception as e:
+            self._handle_sheet_error(INDIVIDUAL_SHEET_ID, e)
             logger.error(f"Error saving individual response: {str(e)}")
-            return False
+            return _write_outcome(e)
+        
+        self.registration_index.mark_stale()
+        for response_data in responses:
+            logger.info(f"Individual response saved for: {response_data['name']}")
+        return WRITE_OK
     
-    def save_team_response(self, response_data: Dict[str, Any]) -> bool:
-        """Save team response to Google Sheets with merged cells for same team"""
+    @timed("sheets_save_team")
+    def save_team_response(self, response_data: Dict[str, Any]) -> str:
+        """Save team response to Google Sheets with merged cells for same team; returns a WRITE_* outcome"""
         try:
-            if not self.client:
-                logger.error("Google Sheets client not initialized")
-                return False
-            
-            # Open the team responses sheet
-            sheet = self.client.open_by_key(TEAM_SHEET_ID)
-            worksheet = sheet.get_worksheet(0)
-            
-            # Define headers for team responses
-            headers = [
-                "Timestamp", "Team Name", "Selected Team", "Member Count", 
-                "Comments", "Member Name", "CRN", "Contact", "Email", "Team Lead"
-            ]
-            
-            # Ensure headers are correct
-            self._ensure_headers(worksheet, headers)
-            
-            # Get current row count to know where to start
-            current_rows = len(worksheet.get_all_values())
-            start_row = current_rows + 1
-            
             # Convert selected teams list to comma-separated string
             selected_teams_str = ", ".join(response_data["selected_teams"])
             
@@ -230,47 +625,84 @@ class SheetsService:
                 response_data["comments"]
             ]
             
-            # Add each member
+            # Build one row per member
             members = response_data["members"]
+            rows = []
             for i, member in enumerate(members):
                 is_team_lead = "Yes" if i == 0 else "No"
                 
-                row_data = team_info + [
+                rows.append(team_info + [
                     member["name"],
                     member["crn"],
                     member["contact"],
                     member["email"],
                     is_team_lead
-                ]
-                
-                worksheet.append_row(row_data)
+                ])
+        except Exception as e:
+            logger.error(f"Invalid team response: {str(e)}")
+            return WRITE_REJECTED
+        
+        try:
+            if not self.client:
+                logger.error("Google Sheets client not initialized")
+                return WRITE_UNAVAILABLE
             
-            # Merge cells for team information (columns A-E) for all rows of this team
-            end_row = start_row + len(members) - 1
+            # Open the team responses sheet
+            sheet, worksheet = self._open_worksheet(TEAM_SHEET_ID)
+            
+            # Define headers for team responses
+            headers = [
+                "Timestamp", "Team Name", "Selected Team", "Member Count", 
+                "Comments", "Member Name", "CRN", "Contact", "Email", "Team Lead"
+            ]
             
+            # Ensure headers are correct
+            self._ensure_headers(worksheet, headers)
+            
+        except Exception as e:
+            self._handle_sheet_error(TEAM_SHEET_ID, e)
+            logger.error(f"Error preparing team response sheet: {str(e)}")
+            return WRITE_UNAVAILABLE
+        
+        # Append all member rows in a single call so a team is always one contiguous
+        # block. INSERT_ROWS makes the server insert fresh rows instead of overwriting
+        # whatever a concurrent submission just wrote, and the response tells us
+        # exactly where our block landed. The lock keeps other teams from this
+        # process from shifting the block before it is merged.
+        with self._team_write_lock:
+            try:
+                append_response = self.scheduler.write(
+                    worksheet.append_rows,
+                    rows,
+                    insert_data_option=InsertDataOption.insert_rows,
+                    table_range="A1"
+                )
+            except Exception as e:
+                self._handle_sheet_error(TEAM_SHEET_ID, e)
+                logger.error(f"Error saving team response: {str(e)}")
+                return _write_outcome(e)
+            
+            updated_range = append_response.get("updates", {}).get("updatedRange", "")
+            
+            # Merge cells for team information (columns A-E) for all rows of this team
             if len(members) > 1:  # Only merge if more than one member
                 try:
-                    # Merge timestamp column (A)
-                    worksheet.merge_cells(f'A{start_row}:A{end_row}')
-                    # Merge team name column (B)
-                    worksheet.merge_cells(f'B{start_row}:B{end_row}')
-                    # Merge selected team column (C)
-                    worksheet.merge_cells(f'C{start_row}:C{end_row}')
-                    # Merge member count column (D)
-                    worksheet.merge_cells(f'D{start_row}:D{end_row}')
-                    # Merge comments column (E)
-                    worksheet.merge_cells(f'E{start_row}:E{end_row}')
+                    start_row, end_row = _parse_row_span(updated_range)
+                    if end_row - start_row + 1 != len(members):
+                        raise ValueError(f"Append wrote {updated_range}, expected {len(members)} rows")
+                    merge_requests = [
+                        _merge_request(worksheet.id, f"{column}{start_row}:{column}{end_row}")
+                        for column in TEAM_MERGED_COLUMNS
+                    ]
+                    self.scheduler.write(sheet.batch_update, {"requests": merge_requests})
                     
                     logger.info(f"Merged cells for team: {response_data['team_name']}")
                 except Exception as merge_error:
                     logger.warning(f"Could not merge cells: {str(merge_error)}")
-            
-            logger.info(f"Team response saved for: {response_data['team_name']}")
-            return True
-            
-        except Exception as e:
-            logger.error(f"Error saving team response: {str(e)}")
-            return False
+        
+        self.registration_index.mark_stale()
+        logger.info(f"Team response saved for: {response_data['team_name']}")
+        return WRITE_OK
     
     def test_connection(self) -> tuple[bool, str]:
         """Test the connection to Google Sheets"""
@@ -279,18 +711,18 @@ class SheetsService:
                 return False, "Google Sheets client not initialized"
             
             # Try to open a test sheet
-            sheet = self.client.open_by_key(INDIVIDUAL_SHEET_ID)
-            worksheet = sheet.get_worksheet(0)
+            sheet, worksheet = self._open_worksheet(INDIVIDUAL_SHEET_ID)
             
             # Try to read the first cell
-            test_value = worksheet.acell('A1').value
+            test_value = self.scheduler.read(worksheet.acell, 'A1').value
             
             return True, "Google Sheets connection successful"
             
         except Exception as e:
+            self._handle_sheet_error(INDIVIDUAL_SHEET_ID, e)
             return False, f"Google Sheets connection failed: {str(e)}"
 
-# Global instance
+# Global instance (no Google I/O until the client is first used)
 sheets_service = SheetsService()
 
 def save_individual_response(response_data: Dict[str, Any]) -> bool:
@@ -299,12 +731,8 @@ def save_individual_response(response_data: Dict[str, Any]) -> bool:
 
 def save_team_response(response_data: Dict[str, Any]) -> bool:
     """Convenience function to save team response"""
-    return sheets_service.save_team_response(response_data)
-
-def check_existing_registrations(email: str) -> Dict[str, Any]:
-    """Convenience function to check existing registrations"""
-    return sheets_service.check_existing_registrations(email)
+    return sheets_service.save_team_response(response_data) == WRITE_OK
 
 def test_sheets_connection() -> tuple[bool, str]:
     """Convenience function to test connection"""
-    return sheets_service.test_connection()
\ No newline at end of file
+    return sheets_service.test_connection()
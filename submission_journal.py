@@ -0,0 +1,375 @@
+import argparse
+import json
+import logging
+import random
+import sqlite3
+import threading
+import time
+from typing import List, Dict, Any, Optional, Tuple
+
+from profiler import timed
+from sheets_service import sheets_service, WRITE_OK, WRITE_REJECTED, WRITE_UNKNOWN
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Local journal database (WAL mode) holding submissions until they reach Google Sheets
+JOURNAL_DB_PATH = "submission_journal.db"
+
+# Flusher settings (seconds / rows)
+FLUSH_INTERVAL = 5
+FLUSH_BATCH_SIZE = 25
+RETRY_BASE_DELAY = 2
+RETRY_MAX_DELAY = 300
+
+SUBMISSION_INDIVIDUAL = "individual"
+SUBMISSION_TEAM = "team"
+
+# Journal entry states
+STATUS_PENDING = "pending"
+# A write failed in a way that may still have landed; check the sheet before resending
+STATUS_UNCONFIRMED = "unconfirmed"
+STATUS_FLUSHED = "flushed"
+STATUS_DEAD = "dead"
+
+# A due journal entry: (id, kind, payload, status, attempts)
+JournalEntry = Tuple[int, str, str, str, int]
+
+
+class SubmissionJournal:
+    """Durable write-behind journal for form submissions.
+
+    Submissions are committed to SQLite first so the form can report success
+    immediately; a background flusher drains them to Google Sheets in batches,
+    retrying with backoff, and resumes from the journal after a restart.
+    Outages are retried for as long as they last; only submissions Google
+    rejects as invalid are parked as dead, to be listed and replayed by hand.
+    """
+
+    def __init__(self, db_path: str = JOURNAL_DB_PATH):
+        self.db_path = db_path
+        self._conn = None
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._flusher = None
+
+    def _connection(self) -> sqlite3.Connection:
+        """Open the journal database on first use"""
+        if self._conn is None:
+            conn = sqlite3.connect(self.db_path, check_same_thread=False, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=FULL")
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS submissions (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    kind TEXT NOT NULL,
+                    payload TEXT NOT NULL,
+                    status TEXT NOT NULL DEFAULT 'pending',
+                    attempts INTEGER NOT NULL DEFAULT 0,
+                    next_attempt_at REAL NOT NULL DEFAULT 0,
+                    last_error TEXT,
+                    created_at REAL NOT NULL,
+                    flushed_at REAL
+                )
+            """)
+            conn.execute(
+                "CREATE INDEX IF NOT EXISTS idx_submissions_pending "
+                "ON submissions (status, next_attempt_at)"
+            )
+            self._conn = conn
+        return self._conn
+
+    def start(self):
+        """Start the background flusher (idempotent)"""
+        with self._lock:
+            if self._flusher and self._flusher.is_alive():
+                return
+            self._flusher = threading.Thread(
+                target=self._run_flusher, name="submission-journal-flusher", daemon=True
+            )
+            self._flusher.start()
+
+    def enqueue(self, kind: str, payload: Dict[str, Any]) -> int:
+        """Durably record a submission and wake the flusher"""
+        with self._lock:
+            cursor = self._connection().execute(
+                "INSERT INTO submissions (kind, payload, created_at) VALUES (?, ?, ?)",
+                (kind, json.dumps(payload), time.time())
+            )
+            entry_id = cursor.lastrowid
+
+        self.start()
+        self._wakeup.set()
+        return entry_id
+
+    def unflushed_payloads(self) -> List[Tuple[str, Dict[str, Any]]]:
+        """(kind, payload) of every submission still on its way to Google Sheets"""
+        with self._lock:
+            rows = self._connection().execute(
+                "SELECT kind, payload FROM submissions WHERE status IN (?, ?) ORDER BY id",
+                (STATUS_PENDING, STATUS_UNCONFIRMED)
+            ).fetchall()
+        return [(kind, json.loads(payload)) for kind, payload in rows]
+
+    def dead_entries(self) -> List[Tuple[int, str, str, Optional[str]]]:
+        """(id, kind, payload, last error) of submissions parked as dead"""
+        with self._lock:
+            return self._connection().execute(
+                "SELECT id, kind, payload, last_error FROM submissions WHERE status = ? ORDER BY id",
+                (STATUS_DEAD,)
+            ).fetchall()
+
+    def replay_dead_entries(self) -> int:
+        """Queue every dead submission for another attempt; returns how many were queued"""
+        with self._lock:
+            cursor = self._connection().execute(
+                "UPDATE submissions SET status = ?, attempts = 0, next_attempt_at = 0 WHERE status = ?",
+                (STATUS_PENDING, STATUS_DEAD)
+            )
+        return cursor.rowcount
+
+    def _run_flusher(self):
+        """Drain the journal until the process exits"""
+        while True:
+            try:
+                self.flush()
+            except Exception as e:
+                logger.error(f"Error flushing submission journal: {str(e)}")
+            self._wakeup.wait(FLUSH_INTERVAL)
+            self._wakeup.clear()
+
+    def _due_entries(self) -> List[JournalEntry]:
+        with self._lock:
+            return self._connection().execute(
+                "SELECT id, kind, payload, status, attempts FROM submissions "
+                "WHERE status IN (?, ?) AND next_attempt_at <= ? ORDER BY id LIMIT ?",
+                (STATUS_PENDING, STATUS_UNCONFIRMED, time.time(), FLUSH_BATCH_SIZE)
+            ).fetchall()
+
+    def flush(self):
+        """Write due submissions to Google Sheets"""
+        with self._flush_lock:
+            entries = self._due_entries()
+            if entries:
+                self._flush_entries(entries)
+
+    def _flush_entries(self, entries: List[JournalEntry]):
+        """Write one batch of journal entries to Google Sheets"""
+        entries = self._confirm_unconfirmed(entries)
+        if not entries:
+            return
+        # Until an outcome is recorded, a crash leaves these to be checked, not blindly resent
+        self._set_status(entries, STATUS_UNCONFIRMED)
+        flushed = []
+
+        # Individual rows share one append; each team is written as its own block
+        individual_entries = [e for e in entries if e[1] == SUBMISSION_INDIVIDUAL]
+        team_entries = [e for e in entries if e[1] == SUBMISSION_TEAM]
+
+        if individual_entries:
+            responses = [json.loads(e[2]) for e in individual_entries]
+            outcome = sheets_service.save_individual_responses(responses)
+            if outcome == WRITE_REJECTED and len(individual_entries) > 1:
+                # Nothing of a rejected batch was written, so rows can be retried alone
+                # to park only the bad one instead of failing every batch it joins
+                logger.warning("Batched individual append was rejected; writing rows one by one")
+                for entry, response in zip(individual_entries, responses):
+                    outcome = sheets_service.save_individual_responses([response])
+                    self._record_outcome([entry], outcome, "individual response", flushed)
+            else:
+                self._record_outcome(individual_entries, outcome, "individual response", flushed)
+
+        for entry in team_entries:
+            outcome = sheets_service.save_team_response(json.loads(entry[2]))
+            self._record_outcome([entry], outcome, "team response", flushed)
+
+        if flushed:
+            # Registration lookups must see the rows before the journal stops reporting them
+            sheets_service.sync_registrations()
+            self._mark_flushed(flushed)
+
+    def _confirm_unconfirmed(self, entries: List[JournalEntry]) -> List[JournalEntry]:
+        """Settle entries whose last write may have landed; returns the entries to write"""
+        if any(e[3] == STATUS_UNCONFIRMED for e in entries):
+            # Look at the sheets as they are now, not as of the last periodic sync
+            sheets_service.sync_registrations()
+
+        to_write = []
+        for entry in entries:
+            entry_id, kind, payload, status, _ = entry
+            if status != STATUS_UNCONFIRMED:
+                to_write.append(entry)
+                continue
+
+            payload = json.loads(payload)
+            found = sheets_service.find_submission(kind, _submission_email(kind, payload), payload["timestamp"])
+            if found:
+                logger.info(f"Submission {entry_id} had reached Google Sheets despite the error")
+                self._mark_flushed([entry])
+            elif found is None:
+                self._mark_failed([entry], "Could not confirm whether the last write landed", STATUS_UNCONFIRMED)
+            else:
+                to_write.append(entry)
+        return to_write
+
+    def _record_outcome(self, entries: List[JournalEntry], outcome: str, what: str, flushed: List[JournalEntry]):
+        if outcome == WRITE_OK:
+            flushed.extend(entries)
+        elif outcome == WRITE_REJECTED:
+            self._mark_dead(entries, f"Google Sheets rejected the {what}")
+        elif outcome == WRITE_UNKNOWN:
+            self._mark_failed(entries, f"Saving the {what} may have failed", STATUS_UNCONFIRMED)
+        else:
+            self._mark_failed(entries, f"Failed to save {what}", STATUS_PENDING)
+
+    def _set_status(self, entries: List[JournalEntry], status: str):
+        with self._lock:
+            self._connection().executemany(
+                "UPDATE submissions SET status = ? WHERE id = ?",
+                [(status, e[0]) for e in entries]
+            )
+
+    def _mark_flushed(self, entries: List[JournalEntry]):
+        with self._lock:
+            self._connection().executemany(
+                "UPDATE submissions SET status = ?, flushed_at = ? WHERE id = ?",
+                [(STATUS_FLUSHED, time.time(), e[0]) for e in entries]
+            )
+        logger.info(f"Flushed {len(entries)} journaled submission(s) to Google Sheets")
+
+    def _mark_failed(self, entries: List[JournalEntry], error: str, status: str):
+        """Schedule another attempt with capped exponential backoff; transient errors never give up"""
+        updates = []
+        for entry_id, _, _, _, attempts in entries:
+            attempts += 1
+            delay = min(RETRY_MAX_DELAY, RETRY_BASE_DELAY * (2 ** min(attempts - 1, 16)))
+            delay = random.uniform(delay / 2, delay)
+            updates.append((status, attempts, time.time() + delay, error, entry_id))
+
+        with self._lock:
+            self._connection().executemany(
+                "UPDATE submissions SET status = ?, attempts = ?, next_attempt_at = ?, last_error = ? WHERE id = ?",
+                updates
+            )
+        logger.warning(f"{error}; {len(entries)} submission(s) affected")
+
+    def _mark_dead(self, entries: List[JournalEntry], error: str):
+        with self._lock:
+            self._connection().executemany(
+                "UPDATE submissions SET status = ?, attempts = attempts + 1, last_error = ? WHERE id = ?",
+                [(STATUS_DEAD, error, e[0]) for e in entries]
+            )
+        for entry in entries:
+            logger.error(f"Submission {entry[0]} was parked: {error}")
+
+
+def _submission_email(kind: str, payload: Dict[str, Any]) -> str:
+    """Email a submission is indexed under (the team lead's for teams)"""
+    if kind == SUBMISSION_INDIVIDUAL:
+        return payload["email"]
+    return payload["members"][0]["email"]
+
+
+# Global instance
+submission_journal = SubmissionJournal()
+
+def start_submission_flusher():
+    """Convenience function to resume draining the journal (e.g. after a restart)"""
+    submission_journal.start()
+
+@timed("save_individual_response")
+def save_individual_response(response_data: Dict[str, Any]) -> bool:
+    """Journal an individual response for background delivery to Google Sheets"""
+    try:
+        submission_journal.enqueue(SUBMISSION_INDIVIDUAL, response_data)
+        return True
+    except Exception as e:
+        logger.error(f"Error journaling individual response: {str(e)}")
+        return False
+
+@timed("save_team_response")
+def save_team_response(response_data: Dict[str, Any]) -> bool:
+    """Journal a team response for background delivery to Google Sheets"""
+    try:
+        submission_journal.enqueue(SUBMISSION_TEAM, response_data)
+        return True
+    except Exception as e:
+        logger.error(f"Error journaling team response: {str(e)}")
+        return False
+
+def _pending_registrations(email: str) -> List[Dict[str, Any]]:
+    """Journaled submissions for ``email`` shaped like registration lookup results"""
+    key = email.lower()
+    registrations = []
+    for kind, payload in submission_journal.unflushed_payloads():
+        if kind == SUBMISSION_INDIVIDUAL:
+            if payload["email"].lower() != key:
+                continue
+            registrations.append({
+                "type": "individual",
+                "teams": list(payload["selected_teams"]),
+                "timestamp": payload["timestamp"],
+                "comments": payload["comments"]
+            })
+        elif any(member["email"].lower() == key for member in payload["members"]):
+            registrations.append({
+                "type": "team",
+                "teams": list(payload["selected_teams"]),
+                "team_name": payload["team_name"],
+                "member_count": payload["member_count"],
+                "timestamp": payload["timestamp"],
+                "comments": payload["comments"]
+            })
+    return registrations
+
+@timed("check_existing_registrations")
+def check_existing_registrations(email: str) -> Dict[str, Any]:
+    """Registrations in Google Sheets plus submissions still waiting in the journal"""
+    try:
+        # Read the journal first: an entry flushed in between is then already in Sheets
+        pending = _pending_registrations(email)
+    except Exception as e:
+        logger.error(f"Error reading journaled registrations: {str(e)}")
+        pending = []
+
+    result = sheets_service.check_existing_registrations(email)
+    if not pending:
+        return result
+
+    # Entries flushed after the journal read appear in both; Sheets keeps the timestamp
+    seen = {(reg["type"], reg["timestamp"]) for reg in result["registrations"]}
+    registrations = list(result["registrations"])
+    teams = set(result["teams"])
+    for reg in pending:
+        if (reg["type"], reg["timestamp"]) in seen:
+            continue
+        reg["id"] = len(registrations) + 1
+        registrations.append(reg)
+        teams.update(reg["teams"])
+
+    return dict(result, found=bool(registrations), teams=list(teams), registrations=registrations)
+
+
+def main():
+    """Admin command line for the submission journal"""
+    parser = argparse.ArgumentParser(description="Submission journal administration")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    subparsers.add_parser("list-dead-submissions", help="List submissions Google Sheets rejected")
+    subparsers.add_parser(
+        "replay-dead-submissions", help="Queue dead submissions for the running app's flusher to write again"
+    )
+    args = parser.parse_args()
+
+    if args.command == "list-dead-submissions":
+        for entry_id, kind, payload, last_error in submission_journal.dead_entries():
+            timestamp = json.loads(payload).get("timestamp")
+            print(f"{entry_id}\t{kind}\t{timestamp}\t{last_error}")
+    else:
+        queued = submission_journal.replay_dead_entries()
+        print(f"Queued {queued} dead submission(s) for another attempt")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,9 +1,10 @@
 import streamlit as st
-from utils import validate_form_data, has_any_field_filled, add_tab, remove_tab
-from email_service import send_confirmation_email
-from sheets_service import save_team_response
+from utils import validate_form_data, has_any_field_filled, add_tab, remove_tab, invalidate_registrations
+from email_dispatcher import queue_confirmation_emails
+from submission_journal import save_team_response
 from datetime import datetime
 
+@st.fragment
 def team_form(user_email):
     with st.form("team_form"):
         st.markdown("### 👥 Team Registration")
@@ -44,15 +45,12 @@ def team_form(user_email):
 
         with col1:
             if st.session_state.num_tabs < 5:
-                if st.form_submit_button("➕ Add Team Member", use_container_width=True):
-                    add_tab()
-                    st.rerun()
+                # The click reruns only this fragment, after the callback updates the count
+                st.form_submit_button("➕ Add Team Member", use_container_width=True, on_click=add_tab)
 
         with col2:
             if st.session_state.num_tabs > 1:
-                if st.form_submit_button("🗑️ Remove Last Member", use_container_width=True):
-                    remove_tab()
-                    st.rerun()
+                st.form_submit_button("🗑️ Remove Last Member", use_container_width=True, on_click=remove_tab)
 
         st.markdown("---")
 
@@ -123,33 +121,41 @@ def team_form(user_email):
                 sheets_success = save_team_response(response_data)
 
                 if sheets_success:
-                    email_results = []
+                    # The team's emails are sent together in the background; the success
+                    # screen tracks their status
+                    emails = []
                     for i, member in enumerate(valid_members):
-                        try:
-                            email_type = "team_lead" if i == 0 else "team_member"
-                            email_sent = send_confirmation_email(
-                                recipient_email=member["email"],
-                                recipient_name=member["name"],
-                                team_name=", ".join(st.session_state.selectedTeams),  # Join multiple teams
-                                submission_type="Team",
-                                team_details={
-                                    "team_name": team_name.strip(),
-                                    "member_count": len(valid_members),
-                                    "team_lead_name": valid_members[0]["name"]
-                                },
-                                email_type=email_type
-                            )
-                            email_results.append(email_sent)
-                        except Exception as e:
-                            email_results.append(False)
-                            st.error(f"Email error for {member['name']}: {str(e)}")
+                        email_type = "team_lead" if i == 0 else "team_member"
+                        emails.append({
+                            "recipient_email": member["email"],
+                            "recipient_name": member["name"],
+                            "team_name": ", ".join(st.session_state.selectedTeams),  # Join multiple teams
+                            "submission_type": "Team",
+                            "team_details": {
+                                "team_name": team_name.strip(),
+                                "member_count": len(valid_members),
+                                "team_lead_name": valid_members[0]["name"]
+                            },
+                            "email_type": email_type
+                        })
 
+                    email_jobs = []
+                    try:
+                        for member, job_id in zip(valid_members, queue_confirmation_emails(emails)):
+                            if job_id:
+                                email_jobs.append(job_id)
+                            else:
+                                st.error(f"Email error for {member['name']}: could not create confirmation email")
+                    except Exception as e:
+                        st.error(f"Email error: {str(e)}")
+
+                    invalidate_registrations()
                     st.session_state.form_submitted = True
                     st.session_state.submission_type = "team"
                     st.session_state.team_name = team_name.strip()
                     st.session_state.member_count = len(valid_members)
                     st.session_state.selected_teams = st.session_state.selectedTeams
-                    st.session_state.successful_emails = sum(email_results)
+                    st.session_state.email_jobs = email_jobs
                     st.rerun()
                 else:
                     st.error("❌ Failed to save team application. Please try again.")
\ No newline at end of file
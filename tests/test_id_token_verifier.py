@@ -0,0 +1,108 @@
+import base64
+import time
+
+import pytest
+from cryptography.hazmat.primitives import serialization
+from cryptography.hazmat.primitives.asymmetric import rsa
+from google.auth import crypt, jwt
+
+from id_token_verifier import SigningKeyCache
+
+AUDIENCE = "test-client-id"
+
+
+def _b64(number: int) -> str:
+    data = number.to_bytes((number.bit_length() + 7) // 8, "big")
+    return base64.urlsafe_b64encode(data).rstrip(b"=").decode("ascii")
+
+
+def _signer(kid: str):
+    """A locally generated RSA key: (signer, matching JWK)"""
+    key = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+    pem = key.private_bytes(
+        serialization.Encoding.PEM, serialization.PrivateFormat.PKCS8, serialization.NoEncryption()
+    )
+    numbers = key.public_key().public_numbers()
+    jwk = {"kty": "RSA", "kid": kid, "alg": "RS256", "n": _b64(numbers.n), "e": _b64(numbers.e)}
+    return crypt.RSASigner.from_string(pem, key_id=kid), jwk
+
+
+class FakeResponse:
+    def __init__(self, keys):
+        self.headers = {"Cache-Control": "public, max-age=3600"}
+        self._keys = keys
+
+    def raise_for_status(self):
+        pass
+
+    def json(self):
+        return {"keys": self._keys}
+
+
+@pytest.fixture(scope="module")
+def signing_key():
+    return _signer("key-1")
+
+
+@pytest.fixture
+def cache(signing_key):
+    _, jwk = signing_key
+    return SigningKeyCache(fetch=lambda: FakeResponse([jwk]))
+
+
+def _token(signer, **overrides):
+    now = int(time.time())
+    claims = {
+        "iss": "https://accounts.google.com",
+        "aud": AUDIENCE,
+        "sub": "1234567890",
+        "email": "user@example.com",
+        "iat": now,
+        "exp": now + 3600,
+    }
+    claims.update(overrides)
+    return jwt.encode(signer, claims)
+
+
+def test_valid_token(cache, signing_key):
+    signer, _ = signing_key
+    claims = cache.verify(_token(signer), AUDIENCE)
+    assert claims["email"] == "user@example.com"
+
+
+def test_wrong_audience(cache, signing_key):
+    signer, _ = signing_key
+    with pytest.raises(ValueError):
+        cache.verify(_token(signer, aud="someone-else"), AUDIENCE)
+
+
+def test_wrong_issuer(cache, signing_key):
+    signer, _ = signing_key
+    with pytest.raises(ValueError):
+        cache.verify(_token(signer, iss="https://evil.example.com"), AUDIENCE)
+
+
+def test_expired_token(cache, signing_key):
+    signer, _ = signing_key
+    issued = int(time.time()) - 7200
+    with pytest.raises(ValueError):
+        cache.verify(_token(signer, iat=issued, exp=issued + 3600), AUDIENCE)
+
+
+def test_unknown_kid(cache):
+    # Signed by a key that is not in the published set, even after the forced refresh
+    other_signer, _ = _signer("key-2")
+    with pytest.raises(ValueError):
+        cache.verify(_token(other_signer), AUDIENCE)
+
+
+def test_rotated_key_is_fetched(signing_key):
+    signer, jwk = signing_key
+    other_signer, other_jwk = _signer("key-2")
+    # Google publishes the new key before signing with it; only one extra fetch is allowed
+    published = iter([[jwk], [jwk, other_jwk]])
+    cache = SigningKeyCache(fetch=lambda: FakeResponse(next(published)))
+
+    cache.verify(_token(signer), AUDIENCE)
+    claims = cache.verify(_token(other_signer), AUDIENCE)
+    assert claims["aud"] == AUDIENCE
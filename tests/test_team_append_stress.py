@@ -0,0 +1,125 @@
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from gspread.utils import a1_range_to_grid_range
+
+from sheets_scheduler import SheetsScheduler
+from sheets_service import SheetsService, TEAM_MERGED_COLUMNS, WRITE_OK
+
+TEAM_HEADERS = [
+    "Timestamp", "Team Name", "Selected Team", "Member Count",
+    "Comments", "Member Name", "CRN", "Contact", "Email", "Team Lead"
+]
+
+
+class FakeTeamSheet:
+    """In-memory stand-in for the team spreadsheet and its first worksheet.
+
+    Appends behave like INSERT_ROWS at the end of the table and report the
+    range they landed in, with some latency so concurrent calls interleave.
+    """
+
+    id = 0
+    spreadsheet_id = "team-sheet"
+    title = "Sheet1"
+
+    def __init__(self):
+        self.rows = [list(TEAM_HEADERS)]
+        self.merges = []
+        self._lock = threading.Lock()
+
+    def row_values(self, row):
+        with self._lock:
+            return list(self.rows[row - 1])
+
+    def update(self, values, range_name):
+        with self._lock:
+            self.rows[0] = list(values[0])
+
+    def append_rows(self, values, insert_data_option=None, table_range=None):
+        time.sleep(random.uniform(0, 0.003))
+        with self._lock:
+            start = len(self.rows) + 1
+            self.rows.extend(list(row) for row in values)
+            end = len(self.rows)
+        return {"updates": {"updatedRange": f"{self.title}!A{start}:J{end}"}}
+
+    def batch_update(self, body):
+        time.sleep(random.uniform(0, 0.003))
+        with self._lock:
+            for request in body["requests"]:
+                grid = request["mergeCells"]["range"]
+                self.merges.append((grid["startColumnIndex"], grid["startRowIndex"] + 1, grid["endRowIndex"]))
+
+
+def _team(i):
+    size = 2 + i % 4
+    return {
+        "timestamp": f"2026-01-01T00:00:{i:02d}",
+        "team_name": f"Team {i}",
+        "selected_teams": ["Technical Team"],
+        "member_count": size,
+        "comments": "",
+        "members": [
+            {"name": f"Member {i}-{m}", "crn": str(m), "contact": "", "email": f"m{i}-{m}@example.com"}
+            for m in range(size)
+        ]
+    }
+
+
+def _service(sheet):
+    service = SheetsService()
+    service._client = object()
+    service.scheduler = SheetsScheduler(read_rate=10 ** 6, write_rate=10 ** 6, burst=10 ** 6)
+    service._open_worksheet = lambda spreadsheet_id, index=0: (sheet, sheet)
+    return service
+
+
+def test_parallel_team_submissions_stay_grouped_and_merged():
+    sheet = FakeTeamSheet()
+    service = _service(sheet)
+    teams = [_team(i) for i in range(50)]
+    stop = threading.Event()
+
+    def other_replica():
+        # Another app instance appending rows outside this process's team lock
+        n = 0
+        while not stop.is_set():
+            sheet.append_rows([["other"] * 4 + [""] + [f"Other {n}", "", "", f"o{n}@example.com", "Yes"]])
+            n += 1
+
+    foreign = threading.Thread(target=other_replica)
+    foreign.start()
+    try:
+        with ThreadPoolExecutor(max_workers=50) as pool:
+            outcomes = list(pool.map(service.save_team_response, teams))
+    finally:
+        stop.set()
+        foreign.join()
+
+    assert outcomes == [WRITE_OK] * len(teams)
+
+    # Every team is one contiguous block, lead first, members in order
+    blocks = {}
+    for row_number, row in enumerate(sheet.rows[1:], start=2):
+        if row[1].startswith("Team "):
+            blocks.setdefault(row[1], []).append((row_number, row))
+    assert len(blocks) == len(teams)
+    for team in teams:
+        block = blocks[team["team_name"]]
+        numbers = [number for number, _ in block]
+        assert numbers == list(range(numbers[0], numbers[0] + len(team["members"])))
+        assert [row[5] for _, row in block] == [m["name"] for m in team["members"]]
+        assert [row[9] for _, row in block] == ["Yes"] + ["No"] * (len(team["members"]) - 1)
+
+    # Each team's info columns are merged over exactly its own rows
+    expected = {
+        (a1_range_to_grid_range(f"{column}1")["startColumnIndex"], numbers[0], numbers[-1])
+        for block in blocks.values()
+        for numbers in [[number for number, _ in block]]
+        for column in TEAM_MERGED_COLUMNS
+    }
+    assert len(sheet.merges) == len(expected)
+    assert set(sheet.merges) == expected
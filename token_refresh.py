@@ -0,0 +1,105 @@
+import logging
+import threading
+import time
+import weakref
+from concurrent.futures import Future, ThreadPoolExecutor
+from datetime import datetime, timezone
+from typing import Dict
+
+import google.auth.transport.requests
+import requests
+
+import metrics
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Start a background refresh this long before the access token expires (seconds)
+REFRESH_AHEAD = 600
+
+# Longest a rerun waits for a refresh once the token is no longer usable (seconds)
+REFRESH_TIMEOUT = 15
+
+# After a failed refresh, skip proactive refreshes for these credentials this long (seconds)
+REFRESH_FAILURE_COOLDOWN = 60
+
+REFRESH_WORKERS = 2
+
+
+class TokenRefreshManager:
+    """Renews OAuth credentials shortly before they expire.
+
+    Refreshes run on a small thread pool; callers asking for the same
+    credentials while a refresh is in flight share that one refresh.
+    """
+
+    def __init__(self, workers: int = REFRESH_WORKERS):
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="oauth-refresh")
+        self._request = google.auth.transport.requests.Request(session=requests.Session())
+        self._in_flight: Dict[int, Future] = {}
+        # Credentials -> monotonic time of their last failed refresh
+        self._last_failure = weakref.WeakKeyDictionary()
+        self._lock = threading.Lock()
+
+    def _refresh(self, key: int, creds):
+        start = time.monotonic()
+        try:
+            creds.refresh(self._request)
+            metrics.increment("oauth_refresh_total")
+            with self._lock:
+                self._last_failure.pop(creds, None)
+        except Exception as e:
+            metrics.increment("oauth_refresh_failures_total")
+            with self._lock:
+                self._last_failure[creds] = time.monotonic()
+            logger.error(f"Error refreshing OAuth credentials: {str(e)}")
+            raise
+        finally:
+            latency = time.monotonic() - start
+            metrics.increment("oauth_refresh_latency_seconds_sum", latency)
+            metrics.increment("oauth_refresh_latency_seconds_count")
+            metrics.set_gauge("oauth_refresh_last_latency_seconds", latency)
+            with self._lock:
+                self._in_flight.pop(key, None)
+
+    def refresh(self, creds) -> Future:
+        """Start a refresh, or join the one already running for these credentials"""
+        key = id(creds)
+        with self._lock:
+            future = self._in_flight.get(key)
+            if future is None:
+                future = self._executor.submit(self._refresh, key, creds)
+                self._in_flight[key] = future
+            else:
+                metrics.increment("oauth_refresh_coalesced_total")
+        return future
+
+    def ensure_fresh(self, creds):
+        """Make sure ``creds`` holds a usable token, renewing ahead of expiry in the background"""
+        if not creds.refresh_token:
+            return
+
+        if creds.expired or not creds.token:
+            # The token can no longer be used, so this rerun has to wait
+            self.refresh(creds).result(timeout=REFRESH_TIMEOUT)
+            return
+
+        if creds.expiry:
+            now = datetime.now(timezone.utc).replace(tzinfo=None)
+            if (creds.expiry - now).total_seconds() <= REFRESH_AHEAD:
+                with self._lock:
+                    failed_at = self._last_failure.get(creds)
+                # The current token still works, so don't hammer a failing token endpoint
+                if failed_at is not None and time.monotonic() - failed_at < REFRESH_FAILURE_COOLDOWN:
+                    metrics.increment("oauth_refresh_skipped_total")
+                    return
+                self.refresh(creds)
+
+
+# Global instance
+token_refresh_manager = TokenRefreshManager()
+
+def ensure_fresh_credentials(creds):
+    """Convenience function to keep a session's OAuth credentials current"""
+    token_refresh_manager.ensure_fresh(creds)
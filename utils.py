@@ -1,6 +1,51 @@
 import streamlit as st
 import re
 import json
+import logging
+import os
+import threading
+from types import MappingProxyType
+from submission_journal import check_existing_registrations
+
+logger = logging.getLogger(__name__)
+
+EMPTY_CONFIG = MappingProxyType({})
+
+# Parsed JSON content files shared read-only by every session: path -> (mtime, data)
+_json_cache = {}
+_json_lock = threading.Lock()
+
+def _freeze(value):
+    """Turn parsed JSON into read-only mappings and tuples so sessions can share it"""
+    if isinstance(value, dict):
+        return MappingProxyType({key: _freeze(item) for key, item in value.items()})
+    if isinstance(value, list):
+        return tuple(_freeze(item) for item in value)
+    return value
+
+def load_shared_json(path):
+    """Return the process-wide parsed copy of a JSON file, reloading only when it changes"""
+    mtime = os.stat(path).st_mtime
+
+    with _json_lock:
+        cached = _json_cache.get(path)
+    if cached and cached[0] == mtime:
+        return cached[1]
+
+    try:
+        with open(path, encoding="utf-8") as f:
+            data = _freeze(json.load(f))
+    except Exception as e:
+        # A half-written edit should not take the page down; keep serving the last good copy
+        if cached:
+            logger.error(f"Error reloading {path}, keeping previous version: {str(e)}")
+            return cached[1]
+        raise
+
+    with _json_lock:
+        _json_cache[path] = (mtime, data)
+    logger.info(f"Loaded {path}")
+    return data
 
 def initialize_session_state():
     """Initialize session state variables"""
@@ -16,26 +61,40 @@ def initialize_session_state():
         st.session_state.allow_additional_registration = False
     if "existing_teams" not in st.session_state:
         st.session_state.existing_teams = []
-    if "data" not in st.session_state:
-        try:
-            with open("team_guidelines.json") as f:
-                st.session_state.data = json.load(f)
-        except FileNotFoundError:
-            st.error("⚠️ team_guidelines.json not found. Please ensure the file exists.")
-            st.session_state.data = {}
-        except Exception as e:
-            st.error(f"⚠️ Error loading team_guidelines.json: {str(e)}")
-            st.session_state.data = {}
-    if "circle_data" not in st.session_state:
-        try:
-            with open("circle_info.json") as f:
-                st.session_state.circle_data = json.load(f)
-        except FileNotFoundError:
-            st.error("⚠️ circle_info.json not found. Please ensure the file exists.")
-            st.session_state.circle_data = {}
-        except Exception as e:
-            st.error(f"⚠️ Error loading circle_info.json: {str(e)}")
-            st.session_state.circle_data = {}
+    # Sessions hold references to the shared read-only content, refreshed each rerun
+    # so edits to the files show up without a restart
+    try:
+        st.session_state.data = load_shared_json("team_guidelines.json")
+    except FileNotFoundError:
+        st.error("⚠️ team_guidelines.json not found. Please ensure the file exists.")
+        st.session_state.data = EMPTY_CONFIG
+    except Exception as e:
+        st.error(f"⚠️ Error loading team_guidelines.json: {str(e)}")
+        st.session_state.data = EMPTY_CONFIG
+    try:
+        st.session_state.circle_data = load_shared_json("circle_info.json")
+    except FileNotFoundError:
+        st.error("⚠️ circle_info.json not found. Please ensure the file exists.")
+        st.session_state.circle_data = EMPTY_CONFIG
+    except Exception as e:
+        st.error(f"⚠️ Error loading circle_info.json: {str(e)}")
+        st.session_state.circle_data = EMPTY_CONFIG
+
+def get_existing_registrations(email):
+    """Registration lookup memoized per session and email; only a submission changes it"""
+    memo = st.session_state.get("registrations_memo")
+    if memo and memo["email"] == email:
+        return memo["result"]
+
+    result = check_existing_registrations(email)
+    # Partial results are retried on the next rerun rather than kept
+    if not result.get("partial"):
+        st.session_state.registrations_memo = {"email": email, "result": result}
+    return result
+
+def invalidate_registrations():
+    """Forget the memoized registration lookup so the next one reads Google Sheets"""
+    st.session_state.pop("registrations_memo", None)
 
 def validate_form_data(name, crn, contact, email):
     """Validate form inputs and return errors"""